@@ -0,0 +1,133 @@
+"""
+A thin client for the query server in `server.py`.
+
+Example:
+
+    >>> with Client() as c:  # doctest: +SKIP
+    ...     c.count(3, 2)
+    Count(value=533, engine='transfer')
+"""
+from __future__ import annotations
+from engines import Count
+from persistent_edge_set import PersistentEdgeSet
+from server import DEFAULT_SOCKET
+from typing import Any, Dict, Iterator, List, Optional
+import argparse
+import json
+import socket
+import transfer
+
+
+class ServerError(RuntimeError):
+    """
+    Raised when the server reports an error for a request.
+    """
+    pass
+
+
+class Client:
+    """
+    A connection to a running query server, on the Unix socket `socket_path`,
+    or on `port` on localhost if given. Requests are answered in order.
+    """
+    sock: socket.socket
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, port: Optional[int] = None) -> None:
+        if port is not None:
+            self.sock = socket.create_connection(("127.0.0.1", port))
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(socket_path)
+        self._file = self.sock.makefile("rwb")
+
+    def __enter__(self) -> Client:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self.sock.close()
+
+    def _send(self, request: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+        self._file.flush()
+
+    def _receive(self) -> Dict[str, Any]:
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        response = json.loads(line)
+        if response.get("ok") is False:
+            raise ServerError(response["error"])
+        return response
+
+    def count(self, width: int, height: int, engine: str = "auto") -> Count:
+        """
+        Return the number of valid edge sets on the grid, and the engine that counted them.
+        """
+        self._send({"op": "count", "width": width, "height": height, "engine": engine})
+        response = self._receive()
+        return Count(response["count"], response["engine"])
+
+    def enumerate(
+        self,
+        width: int,
+        height: int,
+        limit: Optional[int] = None,
+    ) -> Iterator[PersistentEdgeSet]:
+        """
+        Yield the valid edge sets on the grid (at most `limit` of them) as the
+        server streams them.
+
+        The generator must be exhausted before making another request.
+        """
+        self._send({"op": "enumerate", "width": width, "height": height, "limit": limit})
+        while True:
+            response = self._receive()
+            if response.get("done"):
+                return
+            yield transfer.to_edge_set(width, tuple(response["rows"]), tuple(response["stacks"]))
+
+    def sample(
+        self,
+        width: int,
+        height: int,
+        n: int = 1,
+        seed: Optional[int] = None,
+    ) -> List[PersistentEdgeSet]:
+        """
+        Return `n` uniformly random valid edge sets on the grid.
+        """
+        self._send({"op": "sample", "width": width, "height": height, "n": n, "seed": seed})
+        return [
+            transfer.to_edge_set(width, tuple(s["rows"]), tuple(s["stacks"]))
+            for s in self._receive()["samples"]
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("op", choices=["count", "enumerate", "sample"])
+    parser.add_argument("width", type=int, metavar="WIDTH", help="width of the grid")
+    parser.add_argument("height", type=int, metavar="HEIGHT", help="height of the grid")
+    parser.add_argument("-n", type=int, default=1, help="number of edge sets to sample/enumerate")
+    parser.add_argument("--seed", type=int, help="random seed for sampling")
+    parser.add_argument("--socket", type=str, metavar="PATH", default=DEFAULT_SOCKET)
+    parser.add_argument("--port", type=int)
+    args = parser.parse_args()
+
+    with Client(args.socket, args.port) as c:
+        if args.op == "count":
+            print(c.count(args.width, args.height).value)
+        elif args.op == "enumerate":
+            for es in c.enumerate(args.width, args.height, args.n):
+                print("\n" + es.pretty_print())
+        else:
+            for es in c.sample(args.width, args.height, args.n, args.seed):
+                print("\n" + es.pretty_print())
+
+
+if __name__ == '__main__':
+    main()
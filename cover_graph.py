@@ -0,0 +1,250 @@
+"""
+The cover graph (Hasse diagram) of the poset of valid edge sets ordered by inclusion.
+
+Valid edge sets are represented as packed bitmasks, in the layout of
+`external_enumeration` (bit `r*(2w+1) + c` is the horizontal edge `(c, r)`,
+bit `r*(2w+1) + w + c` is the vertical edge `(c, r)`), and numbered in
+increasing order of their masks. A dict from mask to id is the index.
+
+A valid edge set `y` covers `x` if `x < y` and no valid edge set lies
+strictly between them. Covers do not always differ by a single edge: on the
+1x1 grid, the two horizontal edges are covered by the full square, but both
+sets in between have 3 edges around the square.
+
+Every valid edge set satisfies the two stack conditions, and the sets that
+satisfy them are determined by the height of each column of horizontal edges
+and the size of each row of vertical edges, so any larger valid set is
+reached from a valid set `x` by toggling on single edges that each extend
+one stack. If such a set has a square with 3 edges, every valid set above it
+contains the missing fourth edge, and that edge always extends a stack. So
+each stack-closed set has a smallest valid set above it, its closure, found
+by adding fourth edges until there are none left, and the covers of `x` are
+the minimal closures of the sets obtained from `x` by extending one stack.
+That takes time roughly proportional to the number of valid sets times the
+number of edges, instead of comparing all pairs.
+
+The cover relations are streamed to a binary file of `(lower id, upper id)`
+pairs of little-endian uint32s.
+"""
+from array import array
+from external_enumeration import row_offset
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+import argparse
+import logging
+import sys
+import transfer
+
+
+# Number of cover relations buffered before they are written out
+WRITE_BATCH_SIZE = 1 << 16
+
+
+class CoverGraphStats(NamedTuple):
+    """
+    Summary of a cover graph, see `build_cover_graph`.
+
+    `rank_counts[k]` is the number of valid edge sets with `k` edges, and
+    `maximal` and `minimal` are the ids of the maximal and minimal elements.
+    """
+    n_sets: int
+    n_covers: int
+    rank_counts: Dict[int, int]
+    maximal: List[int]
+    minimal: List[int]
+
+
+def pack(width: int, rows: Tuple[int, ...], stacks: Tuple[int, ...]) -> int:
+    """
+    Return the packed mask of the edge set `transfer.to_edge_set(width, rows, stacks)`.
+    """
+    mask = 0
+    for r, row in enumerate(rows):
+        mask |= row << row_offset(width, r)
+    for r, v in enumerate(stacks):
+        mask |= ((1 << v) - 1) << (row_offset(width, r) + width)
+    return mask
+
+
+def valid_masks(width: int, height: int) -> List[int]:
+    """
+    Return the packed masks of the valid edge sets on the grid, in increasing order.
+    """
+    return sorted(pack(width, rows, stacks)
+                  for rows, stacks in transfer.enumerate_rows(width, height))
+
+
+class _Search:
+    """
+    Upward search for the covers of valid edge sets on the `width` x `height` grid.
+    """
+    width: int
+    height: int
+    allowed: Dict[Tuple[int, int], int]
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        table = transfer.transitions(width)
+        self.allowed = {
+            (lower, upper): allowed
+            for lower in range(1 << width)
+            for upper, allowed in table[lower]
+        }
+
+    def row(self, mask: int, r: int) -> int:
+        """
+        Return the bitmask of the horizontal edges on row `r`.
+        """
+        return mask >> row_offset(self.width, r) & ((1 << self.width) - 1)
+
+    def stack(self, mask: int, r: int) -> int:
+        """
+        Return the size of the stack of vertical edges between rows `r` and `r+1`.
+        """
+        return (mask >> (row_offset(self.width, r) + self.width)
+                & ((1 << (self.width+1)) - 1)).bit_length()
+
+    def extensions(self, mask: int) -> Iterator[int]:
+        """
+        Yield each set obtained by extending one stack of `mask` by an edge.
+        """
+        w, h = self.width, self.height
+        for c in range(w):
+            # the lowest missing horizontal edge in column c
+            r = 0
+            while r <= h and mask >> (row_offset(w, r) + c) & 1:
+                r += 1
+            if r <= h:
+                yield mask | 1 << (row_offset(w, r) + c)
+        for r in range(h):
+            v = self.stack(mask, r)
+            if v <= w:
+                yield mask | 1 << (row_offset(w, r) + w + v)
+
+    def fourth_edge(self, mask: int) -> Optional[int]:
+        """
+        Return the bit of the missing edge of a square of `mask` with 3 edges,
+        or `None` if there is no such square.
+        """
+        w = self.width
+        for r in range(self.height):
+            lower, upper, v = self.row(mask, r), self.row(mask, r+1), self.stack(mask, r)
+            if self.allowed[lower, upper] >> v & 1:
+                continue
+            # see `transfer`: the stack ends at the left side of a square
+            # with both horizontal edges, or covers both sides of a square
+            # with only the lower one
+            if v and upper >> (v-1) & 1:
+                return row_offset(w, r) + w + v
+            c = (lower & ~upper & ((1 << (v-1)) - 1)).bit_length() - 1
+            return row_offset(w, r+1) + c
+        return None
+
+    def closure(self, mask: int) -> int:
+        """
+        Return the smallest valid edge set containing the stack-closed set `mask`.
+        """
+        while True:
+            bit = self.fourth_edge(mask)
+            if bit is None:
+                return mask
+            mask |= 1 << bit
+
+    def covers(self, mask: int) -> List[int]:
+        """
+        Return the masks of the valid edge sets covering the valid edge set `mask`.
+        """
+        found = {self.closure(nxt) for nxt in self.extensions(mask)}
+        return [y for y in found if not any(z != y and z & y == z for z in found)]
+
+
+def build_cover_graph(width: int, height: int, out: BinaryIO) -> CoverGraphStats:
+    """
+    Build the cover graph of the valid edge sets on the `width` x `height`
+    grid, writing its edges to `out` as pairs of little-endian uint32 ids
+    `(lower, upper)`, and return a summary of the poset.
+
+    The ids number the valid edge sets in increasing order of their packed
+    masks, see `valid_masks`.
+    """
+    masks = valid_masks(width, height)
+    index = {m: i for i, m in enumerate(masks)}
+    search = _Search(width, height)
+    has_lower = bytearray(len(masks))
+    rank_counts: Dict[int, int] = {}
+    maximal = []
+    n_covers = 0
+    buf = array("I")
+    for i, mask in enumerate(masks):
+        rank = mask.bit_count()
+        rank_counts[rank] = rank_counts.get(rank, 0) + 1
+        upper = search.covers(mask)
+        if not upper:
+            maximal.append(i)
+        for y in upper:
+            j = index[y]
+            has_lower[j] = 1
+            buf.extend((i, j))
+        n_covers += len(upper)
+        if len(buf) >= 2 * WRITE_BATCH_SIZE:
+            _write(out, buf)
+            buf = array("I")
+            logging.info(f"{i+1} of {len(masks)} valid edge sets, {n_covers} covers")
+    _write(out, buf)
+    minimal = [i for i, h in enumerate(has_lower) if not h]
+    return CoverGraphStats(len(masks), n_covers, dict(sorted(rank_counts.items())),
+                           maximal, minimal)
+
+
+def _write(out: BinaryIO, buf: "array[int]") -> None:
+    if sys.byteorder != "little":
+        buf.byteswap()
+    out.write(buf.tobytes())
+
+
+def read_covers(f: BinaryIO) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the `(lower, upper)` pairs of a cover graph file written by `build_cover_graph`.
+    """
+    while True:
+        chunk = f.read(8 * WRITE_BATCH_SIZE)
+        if not chunk:
+            return
+        buf = array("I")
+        buf.frombytes(chunk)
+        if sys.byteorder != "little":
+            buf.byteswap()
+        for k in range(0, len(buf), 2):
+            yield buf[k], buf[k+1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the cover graph of the poset of valid edge sets")
+    parser.add_argument("width", type=int, metavar="WIDTH", help="width of the grid")
+    parser.add_argument("height", type=int, metavar="HEIGHT", help="height of the grid")
+    parser.add_argument("output", type=str, metavar="PATH",
+                        help="file to write the cover relations to, as uint32 id pairs")
+    parser.add_argument(
+        "--loglevel",
+        type=str,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        metavar="LEVEL",
+        default="WARNING",
+        help="logging level to emit: DEBUG, INFO, WARNING (default), ERROR",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=getattr(logging, args.loglevel), format='%(levelname)s:%(message)s')
+
+    with open(args.output, "wb") as out:
+        stats = build_cover_graph(args.width, args.height, out)
+    print(f"valid edge sets: {stats.n_sets}")
+    print(f"cover relations: {stats.n_covers}")
+    print("sets by number of edges: " +
+          ", ".join(f"{k}: {n}" for k, n in stats.rank_counts.items()))
+    print(f"maximal elements: {len(stats.maximal)}")
+    print(f"minimal elements: {len(stats.minimal)}")
+
+
+if __name__ == '__main__':
+    main()
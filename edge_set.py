@@ -34,12 +34,6 @@ class Edge:
         self.row = r
         self.orientation = o
 
-    def __copy__(self):
-        """
-        Copy constructor.
-        """
-        return EdgeSet(self.width, self.height, set(self.edges))
-
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Edge):
             raise NotImplementedError
@@ -116,6 +110,16 @@ class EdgeSet:
     def __str__(self):
         return f"EdgeSet(width={self.width}, height={self.height}, {self.edges})"
 
+    def __copy__(self) -> EdgeSet:
+        """
+        Copy constructor.
+
+        The edge set is copied, the (globally cached) edges themselves are shared.
+        """
+        es = EdgeSet(self.width, self.height)
+        es.edges = set(self.edges)
+        return es
+
     def place_horiz_edge(self, col: int, row: int) -> None:
         """
         Update `edge_set` by adding the horizontal edge at (col, row).
@@ -0,0 +1,269 @@
+"""
+A common interface to the different ways of counting valid edge sets.
+
+Each `Engine` knows which grids it can handle and roughly how expensive it is
+on a given grid. `count` dispatches to the cheapest engine that applies (exact
+closed forms for the families that have them, otherwise the cheapest general
+counter, Tom's algorithm, the transfer matrix over rows, the recurrence in the
+width for a fixed height or the naive enumeration, according to the cost
+model) and records which engine answered.
+`verify` cross-checks two engines against each other.
+"""
+from enumerate_edge_sets import naively_enumerate_edge_sets
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from util import binomial
+import logging
+import math
+import recurrence
+import toms_algorithm
+import transfer
+
+
+class Engine(NamedTuple):
+    """
+    A method of counting valid edge sets.
+
+    - `applies(width, height)` is True if the engine can count the grid.
+    - `cost(width, height)` is the natural logarithm of a rough estimate of the
+      number of elementary operations the engine needs; only the relative
+      order matters. Costs are kept in log space because the operation counts
+      of the exponential engines do not fit in a float.
+    - `run(width, height)` returns the number of valid edge sets.
+    """
+    name: str
+    applies: Callable[[int, int], bool]
+    cost: Callable[[int, int], float]
+    run: Callable[[int, int], int]
+
+
+class Count(NamedTuple):
+    """
+    The number of valid edge sets on a grid, along with the engine that counted them.
+    """
+    value: int
+    engine: str
+
+
+class EngineMismatchError(RuntimeError):
+    """
+    Raised when two engines disagree on the number of valid edge sets.
+    """
+    pass
+
+
+def num_edges(width: int, height: int) -> int:
+    """
+    Return the number of unit length edges in the `width` x `height` grid.
+    """
+    return width * (height+1) + height * (width+1)
+
+
+def height_zero_count(width: int) -> int:
+    """
+    The Nx0 grid has 2^N valid edge sets (all sets are valid).
+    """
+    return 2**width
+
+
+def height_one_count(width: int) -> int:
+    """
+    The Nx1 grid has 3^(N+1) - 2^N valid edge sets, see https://oeis.org/A083313
+    """
+    return 3**(width+1) - 2**width
+
+
+def square_count(n: int) -> int:
+    """
+    The NxN grid has a(N) valid edge sets, where
+
+    a(N) = Sum_{k=0..n+1} k^(n+1) * Sum_{j=0..k} (-1)^(n+1+k-j) * binomial(k, j) * (k-j)^(n+1).
+
+    See https://oeis.org/A220181
+    """
+    return sum(k**(n+1) * sum((-1)**(n+1+k-j) * binomial(k, j) * (k-j)**(n+1)
+                              for j in range(k+1))
+               for k in range(n+2))
+
+
+def _closed_form_applies(width: int, height: int) -> bool:
+    return min(width, height) <= 1 or width == height
+
+
+def _closed_form_cost(width: int, height: int) -> float:
+    if width == height:
+        return 2*math.log(width+2)
+    return math.log(max(width, height, 1))
+
+
+def _closed_form_run(width: int, height: int) -> int:
+    # valid edge set counts are symmetric in width and height
+    short, long = sorted((width, height))
+    if short == 0:
+        return height_zero_count(long)
+    if short == 1:
+        return height_one_count(long)
+    assert width == height
+    return square_count(width)
+
+
+def _toms_orientation(width: int, height: int) -> Tuple[int, int]:
+    """
+    Return the (m, n) argument order for Tom's algorithm that is cheapest to evaluate.
+    """
+    return min([(width, height), (height, width)], key=lambda mn: _toms_log_cost(*mn))
+
+
+def _toms_log_cost(m: int, n: int) -> float:
+    return m*math.log(n+2) + math.log(max(n, 1))
+
+
+def _toms_cost(width: int, height: int) -> float:
+    return _toms_log_cost(*_toms_orientation(width, height))
+
+
+def _toms_run(width: int, height: int) -> int:
+    m, n = _toms_orientation(width, height)
+    return toms_algorithm.count_valid_edge_sets(m, n)
+
+
+def _transfer_orientation(width: int, height: int) -> Tuple[int, int]:
+    """
+    Return the (width, height) argument order for the transfer matrix that is
+    cheapest to evaluate.
+    """
+    return min([(width, height), (height, width)], key=lambda wh: _transfer_log_cost(*wh))
+
+
+def _transfer_log_cost(width: int, height: int) -> float:
+    return width*math.log(3) + math.log(max(height, 1))
+
+
+def _transfer_cost(width: int, height: int) -> float:
+    return _transfer_log_cost(*_transfer_orientation(width, height))
+
+
+def _transfer_run(width: int, height: int) -> int:
+    w, h = _transfer_orientation(width, height)
+    return transfer.count_valid_edge_sets(w, h)
+
+
+def _log_add(a: float, b: float) -> float:
+    """
+    Return log(exp(a) + exp(b)) without overflowing.
+    """
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+def _recurrence_cost(width: int, height: int) -> float:
+    # the recurrence is in the long side, for a fixed short side
+    short, long = sorted((width, height))
+    # fit: a forward sweep of 2 * 2^short + O(1) rows of 3^short transitions,
+    # then Berlekamp-Massey on as many terms
+    fit = short*math.log(3) + (short+1)*math.log(2)
+    fit = _log_add(fit, 2*(short+1)*math.log(2))
+    # evaluate: O(log(long)) multiplications of polynomials of degree <= 2^short
+    evaluate = 2*short*math.log(2) + math.log(math.log2(long+2))
+    return _log_add(fit, evaluate)
+
+
+def _recurrence_run(width: int, height: int) -> int:
+    short, long = sorted((width, height))
+    return recurrence.count_valid_edge_sets(long, short)
+
+
+def _naive_cost(width: int, height: int) -> float:
+    e = num_edges(width, height)
+    return e*math.log(2) + math.log(max(e, 1))
+
+
+def _naive_run(width: int, height: int) -> int:
+    return sum(1 for _ in naively_enumerate_edge_sets(width, height))
+
+
+def _always(width: int, height: int) -> bool:
+    return True
+
+
+# Registry of all engines, by name
+ENGINES: Dict[str, Engine] = {
+    e.name: e for e in [
+        Engine("closed_form", _closed_form_applies, _closed_form_cost, _closed_form_run),
+        Engine("toms", _always, _toms_cost, _toms_run),
+        Engine("transfer", _always, _transfer_cost, _transfer_run),
+        Engine("recurrence", _always, _recurrence_cost, _recurrence_run),
+        Engine("naive", _always, _naive_cost, _naive_run),
+    ]
+}
+
+
+def candidate_engines(width: int, height: int) -> List[Engine]:
+    """
+    Return the engines that apply to the `width` x `height` grid, cheapest first.
+    """
+    engines = [e for e in ENGINES.values() if e.applies(width, height)]
+    return sorted(engines, key=lambda e: e.cost(width, height))
+
+
+def select_engine(width: int, height: int, engine: str = "auto") -> Engine:
+    """
+    Return the engine named `engine`, or the cheapest applicable one if `engine` is "auto".
+    """
+    if engine == "auto":
+        # closed forms are always the cheapest, don't bother costing the other engines
+        closed_form = ENGINES["closed_form"]
+        if closed_form.applies(width, height):
+            return closed_form
+        return candidate_engines(width, height)[0]
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    selected = ENGINES[engine]
+    if not selected.applies(width, height):
+        raise ValueError(f"Engine {engine} does not apply to the {width} x {height} grid")
+    return selected
+
+
+def count(width: int, height: int, engine: str = "auto") -> Count:
+    """
+    Return the number of valid edge sets in the `width` x `height` grid, using
+    the given engine (by default, the cheapest one that applies).
+    """
+    if height < 0 or width < 0:
+        raise ValueError(f"Height ({height}) and width ({width}) must be non-negative!")
+    selected = select_engine(width, height, engine)
+    logging.info(f"Counting valid edge sets on {width} x {height} grid with engine {selected.name}")
+    return Count(selected.run(width, height), selected.name)
+
+
+def verification_engines(width: int, height: int, engine: str = "auto") -> List[str]:
+    """
+    Return the names of the two engines used to verify the count on the
+    `width` x `height` grid: `engine` (selected as in `count`), and the
+    cheapest other engine that applies.
+    """
+    first = select_engine(width, height, engine)
+    others = [e.name for e in candidate_engines(width, height) if e.name != first.name]
+    return [first.name] + others[:1]
+
+
+def verify(width: int, height: int, engines: Optional[List[str]] = None) -> Count:
+    """
+    Count the valid edge sets in the `width` x `height` grid with two (or more)
+    engines and raise `EngineMismatchError` if they disagree.
+
+    By default the engines from `verification_engines` are used.
+    """
+    if engines is None:
+        names = verification_engines(width, height)
+    else:
+        names = engines
+    if len(names) < 2:
+        raise ValueError(f"Need two engines to verify the {width} x {height} grid, got {names}")
+    results = [count(width, height, name) for name in names]
+    for r in results[1:]:
+        if r.value != results[0].value:
+            raise EngineMismatchError(
+                f"Engines disagree on the {width} x {height} grid: " +
+                ", ".join(f"{s.engine}={s.value}" for s in results)
+            )
+    return results[0]
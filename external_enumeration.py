@@ -0,0 +1,260 @@
+"""
+Level-by-level enumeration of valid edge sets with a bounded memory budget.
+
+As described in `enumerate_edge_sets`, every valid edge set of height `h+1`
+is obtained from a valid edge set of height `h` by adding a new top row of
+horizontal edges, and a row of vertical edges below it (see `transfer`). The
+valid edge sets of each height (a "level") can be far too many to hold in
+memory, so each level is stored on disk as a sorted file of packed bitmasks:
+
+- Each edge set is one fixed-width little-endian record. Bits
+  `r*(2w+1) .. r*(2w+1)+w-1` are the horizontal edges on row `r`, and the
+  `w+1` bits after them are the vertical edges between rows `r` and `r+1`,
+  so extending an edge set by a row only appends bits at the top.
+- Level `h+1` is built by streaming level `h` through an `mmap`-backed
+  reader, extending each record, and collecting the children in memory until
+  the budget is used up. The buffer is then sorted and written as a run.
+- The runs are merged (in several passes if there are many) into the file
+  for level `h+1`, and each run, and level `h`, is deleted as soon as it has
+  been consumed.
+
+At any time only one buffer of records, the transition table for the width
+and a bounded number of `mmap` readers are resident, so peak memory stays
+within the budget no matter how many valid edge sets there are.
+"""
+from persistent_edge_set import PersistentEdgeSet
+from typing import Iterable, Iterator, List, Optional
+import heapq
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import transfer
+
+
+# Rough number of bytes of memory used by each buffered record, on top of the
+# record itself (the int object and its slot in the buffer list).
+RECORD_OVERHEAD = 64
+
+# Maximum number of runs merged at once
+MAX_FAN_IN = 64
+
+# Size of the write buffer for run and level files
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse a memory size like "512M", "64G" or "1000000" into bytes.
+
+    >>> parse_size("64K")
+    65536
+    """
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    size = size.strip().upper().rstrip("B")
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+def row_offset(width: int, row: int) -> int:
+    """
+    Return the bit offset of the horizontal edges on row `row` in a packed record.
+    """
+    return row * (2*width + 1)
+
+
+def record_size(width: int, height: int) -> int:
+    """
+    Return the number of bytes in a packed record of an edge set of the given size.
+    """
+    n_bits = row_offset(width, height) + width
+    return max(1, (n_bits + 7) // 8)
+
+
+def table_memory(width: int) -> int:
+    """
+    Return the memory used by `transfer.transitions(width)`, which is mapped
+    from the CSR arrays of `transition_tables`.
+    """
+    return 8 * ((1 << width) + 1) + 8 * 3**width
+
+
+def unpack(width: int, height: int, record: int) -> PersistentEdgeSet:
+    """
+    Return the edge set packed in `record`.
+    """
+    horiz_mask = (1 << width) - 1
+    vert_mask = (1 << (width+1)) - 1
+    horiz = tuple(record >> row_offset(width, r) & horiz_mask for r in range(height+1))
+    vert = tuple(record >> (row_offset(width, r) + width) & vert_mask for r in range(height))
+    return PersistentEdgeSet(width, height, horiz, vert)
+
+
+def read_records(path: str, size: int) -> Iterator[int]:
+    """
+    Yield the records in the file at `path`, through a read-only memory map.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in range(0, len(mm), size):
+                yield int.from_bytes(mm[offset:offset+size], "little")
+
+
+def write_records(path: str, records: Iterable[int], size: int) -> int:
+    """
+    Write the records to the file at `path`, and return how many were written.
+    """
+    n = 0
+    buf = bytearray()
+    with open(path, "wb") as f:
+        for record in records:
+            buf += record.to_bytes(size, "little")
+            n += 1
+            if len(buf) >= WRITE_BUFFER_SIZE:
+                f.write(buf)
+                buf.clear()
+        f.write(buf)
+    return n
+
+
+class LevelEnumerator:
+    """
+    Enumerate the valid edge sets on the `width` x `height` grid level by
+    level, keeping at most about `max_memory` bytes of records in memory.
+
+    The level files are kept in a fresh temporary directory under `tmpdir`,
+    which is removed when the enumeration finishes (or `close` is called).
+    """
+    width: int
+    height: int
+    max_memory: int
+    directory: str
+    _n_files: int
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        max_memory: int,
+        tmpdir: Optional[str] = None,
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.max_memory = max_memory
+        # fail now, rather than halfway through, if the budget is hopeless
+        fixed = table_memory(self.width) + 2*WRITE_BUFFER_SIZE
+        if self.buffer_capacity() < 1:
+            raise ValueError(
+                f"Memory budget of {max_memory} bytes is too small for the {width} x "
+                f"{height} grid, which needs more than {fixed} bytes"
+            )
+        self.directory = tempfile.mkdtemp(prefix="match-sticks-", dir=tmpdir)
+        self._n_files = 0
+
+    def buffer_capacity(self) -> int:
+        """
+        Return the number of records that can be buffered within the budget.
+        """
+        available = self.max_memory - table_memory(self.width) - 2*WRITE_BUFFER_SIZE
+        return available // (RECORD_OVERHEAD + record_size(self.width, self.height))
+
+    def _new_path(self) -> str:
+        self._n_files += 1
+        return os.path.join(self.directory, f"{self._n_files}.bin")
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __iter__(self) -> Iterator[PersistentEdgeSet]:
+        try:
+            level = self.build()
+            yield from (unpack(self.width, self.height, record)
+                        for record in read_records(level, record_size(self.width, self.height)))
+        finally:
+            self.close()
+
+    def build(self) -> str:
+        """
+        Build all levels and return the path of the file holding the last one.
+        """
+        level = self._new_path()
+        n = write_records(level, range(1 << self.width), record_size(self.width, 0))
+        logging.info(f"Level 0: {n} valid edge sets")
+        for h in range(self.height):
+            runs = self._extend(level, h)
+            os.unlink(level)
+            level = self._merge(runs, record_size(self.width, h+1))
+        return level
+
+    def _extend(self, level: str, h: int) -> List[str]:
+        """
+        Stream the level `h` file, extend every edge set by a row, and return
+        the sorted runs of the level `h+1` edge sets.
+        """
+        width = self.width
+        table = transfer.transitions(width)
+        top = row_offset(width, h)
+        horiz_mask = (1 << width) - 1
+        capacity = self.buffer_capacity()
+        size = record_size(width, h+1)
+        runs = []
+        buf: List[int] = []
+        n = 0
+        for record in read_records(level, record_size(width, h)):
+            lower = record >> top & horiz_mask
+            for upper, allowed in table[lower]:
+                base = record | upper << (top + 2*width + 1)
+                for v in transfer.bits(allowed):
+                    buf.append(base | ((1 << v) - 1) << (top + width))
+            if len(buf) >= capacity:
+                n += len(buf)
+                runs.append(self._write_run(buf, size))
+                buf = []
+        n += len(buf)
+        runs.append(self._write_run(buf, size))
+        logging.info(f"Level {h+1}: {n} valid edge sets in {len(runs)} runs")
+        return runs
+
+    def _write_run(self, buf: List[int], size: int) -> str:
+        buf.sort()
+        path = self._new_path()
+        write_records(path, buf, size)
+        return path
+
+    def _merge(self, runs: List[str], size: int) -> str:
+        """
+        Merge the sorted runs into one sorted file, at most `MAX_FAN_IN` at a
+        time, deleting each run once it has been merged. Return the merged file.
+        """
+        while len(runs) > 1:
+            merged = []
+            for i in range(0, len(runs), MAX_FAN_IN):
+                group = runs[i:i+MAX_FAN_IN]
+                if len(group) == 1:
+                    merged.append(group[0])
+                    continue
+                path = self._new_path()
+                write_records(path, heapq.merge(*[read_records(r, size) for r in group]), size)
+                for r in group:
+                    os.unlink(r)
+                merged.append(path)
+            runs = merged
+        return runs[0]
+
+
+def enumerate_edge_sets(
+    width: int,
+    height: int,
+    max_memory: int,
+    tmpdir: Optional[str] = None,
+) -> Iterator[PersistentEdgeSet]:
+    """
+    Enumerate the valid edge sets on the `width` x `height` grid using at most
+    about `max_memory` bytes of memory for intermediate results. See
+    `LevelEnumerator`.
+    """
+    yield from LevelEnumerator(width, height, max_memory, tmpdir)
@@ -1,31 +1,66 @@
 """
 Command line program for enumerating valid edge sets.
+
+Run `main.py serve --help` for the long-running query server.
 """
 
 from enumerate_edge_sets import naively_enumerate_edge_sets
+from external_enumeration import parse_size
+from marginals import Marginals
+from render import Renderer
 import argparse
+import engines
+import external_enumeration
 import logging
-import toms_algorithm
+import shutil
+import sys
 
 
 def run_enumeration(args):
-    if args.toms:
-        print(toms_algorithm.count_valid_edge_sets(args.width, args.height))
+    if args.marginals:
+        print(Marginals(args.width, args.height).heatmap())
+    elif args.max_memory is not None and not args.verbose:
+        valid_edge_sets = external_enumeration.enumerate_edge_sets(
+            args.width, args.height, args.max_memory, args.tmpdir
+        )
+        print(sum(1 for _ in valid_edge_sets))
+    elif args.verbose and not args.toms:
+        if args.max_memory is not None:
+            valid_edge_sets = external_enumeration.enumerate_edge_sets(
+                args.width, args.height, args.max_memory, args.tmpdir
+            )
+        else:
+            # TODO replace naive version with recursive version
+            valid_edge_sets = naively_enumerate_edge_sets(args.width, args.height)
+        renderer = Renderer(args.width, args.height)
+        out = sys.stdout.buffer
+        sys.stdout.flush()
+        # edge sets are numbered starting at 1, count like a mathematician
+        if args.side_by_side:
+            columns = renderer.columns_for(shutil.get_terminal_size().columns)
+            renderer.write_side_by_side(valid_edge_sets, out, columns)
+        else:
+            renderer.write_stacked(valid_edge_sets, out)
+        out.flush()
     else:
-        # TODO replace naive version with recursive version
-        valid_edge_sets = naively_enumerate_edge_sets(args.width, args.height)
-
-        if args.verbose:
-            c = 0
-            for es in valid_edge_sets:
-                c = c + 1  # count like a mathematician
-                print(f"\n{c}:\n" + es.pretty_print())
+        engine = "toms" if args.toms else args.engine
+        if args.verify:
+            names = engines.verification_engines(args.width, args.height, engine)
+            result = engines.verify(args.width, args.height, names)
         else:
-            # just print the number without any adornment. Makes the program more unix friendly.
-            print(len(list(valid_edge_sets)))
+            result = engines.count(args.width, args.height, engine)
+        logging.info(f"Counted by engine: {result.engine}")
+        # just print the number without any adornment. Makes the program more unix friendly.
+        print(result.value)
 
 
 def main():
+    if sys.argv[1:2] == ["serve"]:
+        # long-running query server, see server.py
+        import server
+        server.main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "width",
@@ -42,13 +77,50 @@ def main():
     parser.add_argument(
         "-t", "--toms",
         action="store_true",
-        help="count valid edge sets using Tom's algorithm",
+        help="count valid edge sets using Tom's algorithm (same as --engine toms)",
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        choices=["auto"] + list(engines.ENGINES),
+        metavar="ENGINE",
+        default="auto",
+        help="engine used to count valid edge sets: " +
+             ", ".join(["auto (default)"] + list(engines.ENGINES)),
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="count with the two cheapest engines and fail if they disagree",
     )
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="pretty print enumerated edge sets",
     )
+    parser.add_argument(
+        "--side-by-side",
+        action="store_true",
+        help="with --verbose, pack as many edge sets per line as fit the terminal",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_size,
+        metavar="SIZE",
+        help="enumerate level by level through sorted runs on disk, using at most "
+             "about SIZE bytes of memory (e.g. 512M, 16G)",
+    )
+    parser.add_argument(
+        "--tmpdir",
+        type=str,
+        metavar="DIR",
+        help="with --max-memory, directory for the on-disk runs (default: system temp dir)",
+    )
+    parser.add_argument(
+        "--marginals",
+        action="store_true",
+        help="print a heatmap of the probability that each edge is in a valid edge set",
+    )
     parser.add_argument(
         "--profile",
         action="store_true",
@@ -64,6 +136,12 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.side_by_side and not args.verbose:
+        parser.error("--side-by-side requires --verbose")
+    if args.tmpdir is not None and args.max_memory is None:
+        parser.error("--tmpdir requires --max-memory")
+    if args.max_memory is not None and args.toms:
+        parser.error("--max-memory enumerates edge sets and can't be combined with --toms")
 
     numeric_level = getattr(logging, args.loglevel.upper(), None)
     if not isinstance(numeric_level, int):
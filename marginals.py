@@ -0,0 +1,212 @@
+"""
+Exact per-edge inclusion counts for valid edge sets.
+
+Rather than tallying every valid edge set, the counts are computed with one
+forward and one backward sweep over the rows of the grid (see `transfer`).
+The number of valid edge sets containing the horizontal edge at (c, r) is the
+sum of `forward[r][s] * backward[r][s]` over the row states `s` containing
+`c`, and similarly for vertical edges, using the transitions between rows `r`
+and `r+1`.
+
+The sweeps take O(height * 3^width * width) big-int operations, so grids
+wider than they are tall are transposed first (valid edge sets are symmetric
+under reflection across the diagonal, with horizontal and vertical edges
+trading places).
+"""
+from edge_set import Edge, Orientation
+from fractions import Fraction
+from render import Renderer
+from transition_tables import TransitionTable
+from typing import Dict, Iterable, List, Tuple
+import transfer
+
+
+# Characters used to render probabilities, from lowest to highest
+HEATMAP_LEVELS = " .:-=+o#%@"
+
+
+class Marginals:
+    """
+    The number of valid edge sets on the `width` x `height` grid containing
+    each edge.
+
+    - `horiz[r][c]` is the number of valid edge sets containing the horizontal
+      edge at (c, r), for 0 <= r <= height and 0 <= c < width.
+    - `vert[r][c]` is the number of valid edge sets containing the vertical
+      edge at (c, r), for 0 <= r < height and 0 <= c <= width.
+    - `total` is the number of valid edge sets.
+    """
+    width: int
+    height: int
+    total: int
+    horiz: List[List[int]]
+    vert: List[List[int]]
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        if width > height:
+            # the sweeps are exponential in the width, so count on the transposed
+            # grid, where horizontal and vertical edges trade places
+            transposed = Marginals(height, width)
+            self.total = transposed.total
+            self.horiz = _transpose(transposed.vert)
+            self.vert = _transpose(transposed.horiz)
+            return
+        table = transfer.transitions(width)
+        fwd = transfer.forward(width, height)
+        bwd = transfer.backward(width, height)
+        self.total = sum(fwd[-1])
+        self.horiz = _horiz_counts(width, fwd, bwd)
+        self.vert = _vert_counts(width, table, fwd, bwd)
+
+    def count(self, e: Edge) -> int:
+        """
+        Return the number of valid edge sets containing `e`.
+        """
+        if e.orientation == Orientation.HORIZONTAL:
+            return self.horiz[e.row][e.col]
+        return self.vert[e.row][e.col]
+
+    def probability(self, e: Edge) -> Fraction:
+        """
+        Return the probability that a uniformly random valid edge set contains `e`.
+        """
+        return Fraction(self.count(e), self.total)
+
+    def heatmap(self, levels: str = HEATMAP_LEVELS) -> str:
+        """
+        Return the inclusion probabilities rendered in the same layout as
+        `EdgeSet.pretty_print`, with each edge drawn using the character from
+        `levels` corresponding to its probability.
+
+        Example, on the 1x1 grid:
+
+        ```
+        *--*
+        +  -
+        *++*
+        ```
+        """
+        def shade(n: int) -> str:
+            i = (n * (len(levels) - 1) + self.total // 2) // self.total
+            return levels[i]
+
+        renderer = Renderer(self.width, self.height)
+        buf = bytearray(renderer.template)
+        for r, row in enumerate(self.horiz):
+            for c, n in enumerate(row):
+                for o in renderer.offsets[Edge.horiz_edge(c, r)]:
+                    buf[o] = ord(shade(n))
+        for r, row in enumerate(self.vert):
+            for c, n in enumerate(row):
+                for o in renderer.offsets[Edge.vert_edge(c, r)]:
+                    buf[o] = ord(shade(n))
+        return buf.decode("ascii")
+
+
+def _transpose(counts: List[List[int]]) -> List[List[int]]:
+    return [list(col) for col in zip(*counts)]
+
+
+def _transposed(e: Edge) -> Edge:
+    """
+    Return the edge reflected across the diagonal of the grid.
+    """
+    if e.orientation == Orientation.HORIZONTAL:
+        return Edge.vert_edge(e.row, e.col)
+    return Edge.horiz_edge(e.row, e.col)
+
+
+def _horiz_counts(width: int, fwd: List[List[int]], bwd: List[List[int]]) -> List[List[int]]:
+    """
+    Return the inclusion counts of the horizontal edges, row by row.
+    """
+    counts = []
+    for f_row, b_row in zip(fwd, bwd):
+        row = [0] * width
+        for s, f in enumerate(f_row):
+            w = f * b_row[s]
+            if w:
+                for c in range(width):
+                    if s >> c & 1:
+                        row[c] += w
+        counts.append(row)
+    return counts
+
+
+def _vert_counts(
+    width: int,
+    table: TransitionTable,
+    fwd: List[List[int]],
+    bwd: List[List[int]],
+) -> List[List[int]]:
+    """
+    Return the inclusion counts of the vertical edges, row by row.
+    """
+    counts = []
+    for r in range(len(fwd) - 1):
+        # by_size[v] = number of valid edge sets with v vertical edges on row r
+        by_size = [0] * (width+2)
+        for lower, f in enumerate(fwd[r]):
+            if f:
+                for upper, allowed in table[lower]:
+                    w = f * bwd[r+1][upper]
+                    for v in range(width+2):
+                        if allowed >> v & 1:
+                            by_size[v] += w
+        # the vertical edge at column c is present when v > c
+        row = [0] * (width+1)
+        acc = 0
+        for c in range(width, -1, -1):
+            acc += by_size[c+1]
+            row[c] = acc
+        counts.append(row)
+    return counts
+
+
+def count_containing(width: int, height: int, edges: Iterable[Edge]) -> int:
+    """
+    Return the number of valid edge sets on the `width` x `height` grid that
+    contain all of the given edges, with a single (restricted) forward sweep.
+    """
+    if width > height:
+        return count_containing(height, width, [_transposed(e) for e in edges])
+    # required horizontal edges, and minimum vertical stack size, on each row
+    required_horiz = [0] * (height+1)
+    min_stack = [0] * height
+    for e in edges:
+        if e.orientation == Orientation.HORIZONTAL:
+            assert 0 <= e.row <= height and 0 <= e.col < width
+            required_horiz[e.row] |= 1 << e.col
+        else:
+            assert 0 <= e.row < height and 0 <= e.col <= width
+            min_stack[e.row] = max(min_stack[e.row], e.col+1)
+
+    table = transfer.transitions(width)
+    weights = [
+        1 if s & required_horiz[0] == required_horiz[0] else 0 for s in range(1 << width)
+    ]
+    for r in range(height):
+        nxt = [0] * (1 << width)
+        required = required_horiz[r+1]
+        stack_mask = ~((1 << min_stack[r]) - 1)
+        for lower, w in enumerate(weights):
+            if w:
+                for upper, allowed in table[lower]:
+                    if upper & required == required:
+                        nxt[upper] += w * (allowed & stack_mask).bit_count()
+        weights = nxt
+    return sum(weights)
+
+
+def co_occurrences(
+    width: int,
+    height: int,
+    pairs: Iterable[Tuple[Edge, Edge]],
+) -> Dict[Tuple[Edge, Edge], int]:
+    """
+    Return the number of valid edge sets on the `width` x `height` grid that
+    contain both edges of each of the given pairs.
+    """
+    return {(e1, e2): count_containing(width, height, [e1, e2]) for e1, e2 in pairs}
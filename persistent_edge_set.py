@@ -0,0 +1,296 @@
+"""
+A persistent (immutable, structure sharing) variant of `EdgeSet`.
+
+Recursive enumerators build a very large number of edge sets, each one a small
+modification of its parent. Copying the parent's `edges` set for every child
+dominates the cost of such a search. A `PersistentEdgeSet` never changes once
+constructed; instead, every "modifying" method returns a new edge set that
+shares all of the unchanged structure with the original.
+"""
+from __future__ import annotations
+from typing import FrozenSet, Iterator, Tuple
+from edge_set import Edge, EdgeSet, Orientation, INADMISSIBLE_BOUNDARY
+from render import HORIZ_CHAR, VERT_CHAR, get_renderer
+
+
+def _set_bits(mask: int) -> Iterator[int]:
+    """
+    Yield the positions of the set bits in `mask`, least significant first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _replace(segments: Tuple[int, ...], index: int, value: int) -> Tuple[int, ...]:
+    """
+    Return `segments` with the entry at `index` replaced by `value`.
+
+    Missing entries past the end of `segments` are implicitly zero and are
+    materialized as needed.
+    """
+    if index >= len(segments):
+        segments = segments + (0,) * (index + 1 - len(segments))
+    return segments[:index] + (value,) + segments[index+1:]
+
+
+class PersistentEdgeSet:
+    """
+    An immutable edge set on the `width` x `height` grid.
+
+    The edges are stored as per-row immutable segments: for each row `r`,
+    `horiz_row(r)` is a bitmask of the columns `c` such that the horizontal
+    edge at (c, r) is present, and `vert_row(r)` is a bitmask of the columns
+    `c` such that the vertical edge at (c, r) is present. Rows past the end of
+    the stored segments are empty, so that `embed` does not need to touch the
+    segments at all.
+
+    Every method that adds edges returns a new `PersistentEdgeSet`. Only the
+    segments of the rows that actually change are rebuilt; the remaining
+    segments (and the `Edge` objects, which are globally cached) are shared
+    with the parent.
+
+    The read API (`width`, `height`, `edges`, `is_left_ok`, `is_down_ok`,
+    `check_boundary_constraint`, `check_constraints` and `pretty_print`) is
+    compatible with `EdgeSet`.
+    """
+    __slots__ = ("width", "height", "_horiz", "_vert")
+
+    width: int
+    height: int
+    _horiz: Tuple[int, ...]
+    _vert: Tuple[int, ...]
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        horiz: Tuple[int, ...] = (),
+        vert: Tuple[int, ...] = (),
+    ) -> None:
+        assert len(horiz) <= height + 1
+        assert len(vert) <= height
+        self.width = width
+        self.height = height
+        self._horiz = horiz
+        self._vert = vert
+
+    @staticmethod
+    def from_edge_set(es: EdgeSet) -> PersistentEdgeSet:
+        """
+        Construct a persistent edge set with the same edges as `es`.
+        """
+        horiz = [0] * (es.height + 1)
+        vert = [0] * es.height
+        for e in es.edges:
+            if e.orientation == Orientation.HORIZONTAL:
+                horiz[e.row] |= 1 << e.col
+            else:
+                vert[e.row] |= 1 << e.col
+        return PersistentEdgeSet(es.width, es.height, tuple(horiz), tuple(vert))
+
+    def to_edge_set(self) -> EdgeSet:
+        """
+        Return a (mutable) `EdgeSet` with the same edges as self.
+        """
+        es = EdgeSet(self.width, self.height)
+        es.edges = set(self.edges)
+        return es
+
+    def __str__(self) -> str:
+        return f"PersistentEdgeSet(width={self.width}, height={self.height}, {set(self.edges)})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PersistentEdgeSet):
+            return NotImplemented
+        return (
+            self.width == other.width and
+            self.height == other.height and
+            all(self.horiz_row(r) == other.horiz_row(r) for r in range(self.height+1)) and
+            all(self.vert_row(r) == other.vert_row(r) for r in range(self.height))
+        )
+
+    def __hash__(self) -> int:
+        return hash((
+            self.width,
+            self.height,
+            tuple(self.horiz_row(r) for r in range(self.height+1)),
+            tuple(self.vert_row(r) for r in range(self.height)),
+        ))
+
+    def __contains__(self, e: Edge) -> bool:
+        if e.orientation == Orientation.HORIZONTAL:
+            return bool(self.horiz_row(e.row) >> e.col & 1)
+        return bool(self.vert_row(e.row) >> e.col & 1)
+
+    def __len__(self) -> int:
+        return sum(s.bit_count() for s in self._horiz + self._vert)
+
+    def horiz_row(self, row: int) -> int:
+        """
+        Return the bitmask of horizontal edges on row `row`.
+        """
+        return self._horiz[row] if row < len(self._horiz) else 0
+
+    def vert_row(self, row: int) -> int:
+        """
+        Return the bitmask of vertical edges with lower-most point on row `row`.
+        """
+        return self._vert[row] if row < len(self._vert) else 0
+
+    def segments(self) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """
+        Return the stored horizontal and vertical row segments.
+
+        These tuples are shared (not copied) between an edge set and the edge
+        sets derived from it, wherever the rows they hold are unchanged. Rows
+        past the end of a tuple are empty.
+        """
+        return self._horiz, self._vert
+
+    @property
+    def edges(self) -> FrozenSet[Edge]:
+        """
+        The set of edges, materialized on demand.
+        """
+        return frozenset(
+            [Edge.horiz_edge(c, r) for r, s in enumerate(self._horiz) for c in _set_bits(s)] +
+            [Edge.vert_edge(c, r) for r, s in enumerate(self._vert) for c in _set_bits(s)]
+        )
+
+    def embed(self) -> PersistentEdgeSet:
+        """
+        Return a new edge set with the same edges as self, but on a grid one row
+        taller.
+
+        This is O(1); all of the row segments are shared with self.
+        """
+        return PersistentEdgeSet(self.width, self.height + 1, self._horiz, self._vert)
+
+    def add_row(self, horiz: int, vert: int) -> PersistentEdgeSet:
+        """
+        Return a new edge set on a grid one row taller, with the horizontal edges
+        in the bitmask `horiz` placed on the new top row and the vertical edges in
+        the bitmask `vert` placed on the new top-most row of vertical edges.
+        """
+        assert 0 <= horiz < 1 << self.width
+        assert 0 <= vert < 1 << (self.width + 1)
+        height = self.height + 1
+        horiz_segments = self._horiz
+        if horiz:
+            horiz_segments = _replace(horiz_segments, height, horiz)
+        vert_segments = self._vert
+        if vert:
+            vert_segments = _replace(vert_segments, height - 1, vert)
+        return PersistentEdgeSet(self.width, height, horiz_segments, vert_segments)
+
+    def with_horiz_edge(self, col: int, row: int) -> PersistentEdgeSet:
+        """
+        Return a new edge set with the horizontal edge at (col, row) added.
+        """
+        assert 0 <= row and row <= self.height
+        assert 0 <= col and col < self.width
+        segment = self.horiz_row(row) | 1 << col
+        horiz = _replace(self._horiz, row, segment)
+        return PersistentEdgeSet(self.width, self.height, horiz, self._vert)
+
+    def with_vert_edge(self, col: int, row: int) -> PersistentEdgeSet:
+        """
+        Return a new edge set with the vertical edge at (col, row) added.
+        """
+        assert 0 <= row and row < self.height
+        assert 0 <= col and col <= self.width
+        segment = self.vert_row(row) | 1 << col
+        vert = _replace(self._vert, row, segment)
+        return PersistentEdgeSet(self.width, self.height, self._horiz, vert)
+
+    def with_horiz_stack(self, col: int, row: int) -> PersistentEdgeSet:
+        """
+        Return a new edge set with all horizontal edges in a stack starting with
+        the one at (col, row) and including all edges below it added.
+        """
+        assert 0 <= row and row <= self.height
+        assert 0 <= col and col < self.width
+        bit = 1 << col
+        horiz = self._horiz
+        if len(horiz) <= row:
+            horiz = horiz + (0,) * (row + 1 - len(horiz))
+        # rows above the stack are shared with self
+        horiz = tuple(s | bit for s in horiz[:row+1]) + horiz[row+1:]
+        return PersistentEdgeSet(self.width, self.height, horiz, self._vert)
+
+    def with_vert_stack(self, col: int, row: int) -> PersistentEdgeSet:
+        """
+        Return a new edge set with all vertical edges in a left-facing stack
+        starting with the one at (col, row) and including all edges to the left
+        of it added.
+        """
+        assert 0 <= row and row < self.height
+        assert 0 <= col and col <= self.width
+        segment = self.vert_row(row) | ((1 << (col + 1)) - 1)
+        vert = _replace(self._vert, row, segment)
+        return PersistentEdgeSet(self.width, self.height, self._horiz, vert)
+
+    def is_left_ok(self, col: int, row: int) -> bool:
+        """
+        Return True if all vertical edges strictly to the left of the one at
+        (col, row) are in the edge set.
+        """
+        below = (1 << col) - 1
+        return self.vert_row(row) & below == below
+
+    def is_down_ok(self, col: int, row: int) -> bool:
+        """
+        Return True if all horizontal edges strictly below the one at
+        (col, row) are in the edge set.
+        """
+        return all(self.horiz_row(r) >> col & 1 for r in range(row))
+
+    def check_boundary_constraint(self, col: int, row: int) -> bool:
+        boundary = (
+            (self.horiz_row(row) >> col & 1) +
+            (self.horiz_row(row+1) >> col & 1) +
+            (self.vert_row(row) >> col & 3).bit_count()
+        )
+        return boundary != INADMISSIBLE_BOUNDARY
+
+    def check_constraints(self) -> bool:
+        """
+        Return True if the edge set is valid.
+
+        The stack conditions are checked a whole row at a time: the vertical
+        edges on a row must form a prefix of the columns, and the horizontal
+        edges on each row must be a subset of those on the row below.
+        """
+        for r in range(self.height):
+            v = self.vert_row(r)
+            if v & (v + 1):
+                return False
+        for r in range(1, self.height+1):
+            if self.horiz_row(r) & ~self.horiz_row(r-1):
+                return False
+        for r in range(self.height):
+            for c in range(self.width):
+                if not self.check_boundary_constraint(c, r):
+                    return False
+        return True
+
+    def pretty_print(self) -> str:
+        """
+        Return a pretty printed string representation of the edge set.
+
+        The output is identical to `EdgeSet.pretty_print`. The edges are
+        stamped straight from the row segments into the template of a cached
+        `render.Renderer`, without materializing the set of edges.
+        """
+        renderer = get_renderer(self.width, self.height)
+        buf = bytearray(renderer.template)
+        for r, s in enumerate(self._horiz):
+            for c in _set_bits(s):
+                o = renderer.offset(3*c, 2*r)
+                buf[o+1] = buf[o+2] = HORIZ_CHAR
+        for r, s in enumerate(self._vert):
+            for c in _set_bits(s):
+                buf[renderer.offset(3*c, 2*r+1)] = VERT_CHAR
+        return buf.decode("ascii")
@@ -0,0 +1,175 @@
+"""
+Count valid edge sets on wide, short grids using a linear recurrence in the width.
+
+For a fixed height `n`, the transfer matrix `T` over the rows of the
+transposed `n` x `m` grid (see `transfer`) has `2^n` states, and
+
+    count_valid_edge_sets(m, n) == 1^T T^m 1
+
+so the sequence `a(m) = count_valid_edge_sets(m, n)` satisfies a linear
+recurrence of order at most `D = 2^n` (by Cayley-Hamilton). The minimal such
+recurrence is uniquely determined by the first `2D` terms, and the
+Berlekamp-Massey algorithm finds it from them. Since `T` has integer entries,
+the recurrence has integer coefficients.
+
+Once the recurrence is known, `a(m)` for any `m` is computed from its first
+terms by reducing `x^m` modulo the characteristic polynomial, with
+O(log m) polynomial multiplications.
+
+For example, the Nx1 grid has 3^(N+1) - 2^N valid edge sets, which satisfies
+the recurrence a(m) = 5 a(m-1) - 6 a(m-2).
+"""
+from fractions import Fraction
+from functools import lru_cache
+from typing import List, NamedTuple, Sequence, Tuple
+import transfer
+
+
+# Number of terms past the `2D` needed by Berlekamp-Massey that are used to
+# cross-check a recurrence.
+EXTRA_TERMS = 4
+
+
+class RecurrenceError(RuntimeError):
+    """
+    Raised when a recurrence does not reproduce the terms it was checked against.
+    """
+    pass
+
+
+class Recurrence(NamedTuple):
+    """
+    A linear recurrence `a(m) = sum(coefficients[i] * a(m-1-i))` for
+    `m >= len(coefficients)`, along with its first terms `initial`.
+    """
+    coefficients: Tuple[int, ...]
+    initial: Tuple[int, ...]
+
+    @property
+    def order(self) -> int:
+        return len(self.coefficients)
+
+    def term(self, m: int) -> int:
+        """
+        Return `a(m)`, using O(order^2 * log m) arithmetic operations.
+        """
+        if m < self.order:
+            return self.initial[m]
+        weights = self.power_of_x(m)
+        return sum(w * a for w, a in zip(weights, self.initial))
+
+    def power_of_x(self, m: int) -> List[int]:
+        """
+        Return the coefficients (lowest degree first) of `x^m` modulo the
+        characteristic polynomial of the recurrence, by repeated squaring.
+        """
+        result = [1] + [0] * (self.order - 1)
+        base = self._reduce([0, 1])
+        while m:
+            if m & 1:
+                result = self._reduce(_poly_mul(result, base))
+            base = self._reduce(_poly_mul(base, base))
+            m >>= 1
+        return result
+
+    def _reduce(self, p: List[int]) -> List[int]:
+        """
+        Reduce the polynomial `p` modulo `x^L - c_1 x^{L-1} - ... - c_L`.
+        """
+        order = self.order
+        p = p + [0] * max(0, order - len(p))
+        for d in range(len(p) - 1, order - 1, -1):
+            lead = p[d]
+            if lead:
+                p[d] = 0
+                for i, c in enumerate(self.coefficients):
+                    p[d-1-i] += c * lead
+        return p[:order]
+
+
+def _poly_mul(p: Sequence[int], q: Sequence[int]) -> List[int]:
+    res = [0] * (len(p) + len(q) - 1)
+    for i, x in enumerate(p):
+        if x:
+            for j, y in enumerate(q):
+                res[i+j] += x * y
+    return res
+
+
+def berlekamp_massey(seq: Sequence[int]) -> List[Fraction]:
+    """
+    Return the coefficients `c` of the shortest linear recurrence
+    `seq[k] = sum(c[i] * seq[k-1-i])` satisfied by every `k >= len(c)`, over
+    the rationals.
+
+    >>> berlekamp_massey([1, 1, 2, 3, 5, 8, 13])
+    [Fraction(1, 1), Fraction(1, 1)]
+    """
+    # connection polynomial `conn` (with conn[0] == 1) of the current
+    # recurrence, and `prev` of the one before the last length change
+    conn = [Fraction(1)]
+    prev = [Fraction(1)]
+    length = 0
+    shift = 1
+    prev_discrepancy = Fraction(1)
+    for k, s in enumerate(seq):
+        discrepancy = Fraction(s) + sum(conn[i] * seq[k-i] for i in range(1, length+1))
+        if discrepancy == 0:
+            shift += 1
+            continue
+        coef = discrepancy / prev_discrepancy
+        updated = conn + [Fraction(0)] * max(0, len(prev) + shift - len(conn))
+        for i, p in enumerate(prev):
+            updated[i+shift] -= coef * p
+        if 2*length <= k:
+            prev = conn
+            prev_discrepancy = discrepancy
+            length = k + 1 - length
+            shift = 1
+        else:
+            shift += 1
+        conn = updated
+    conn = conn + [Fraction(0)] * max(0, length + 1 - len(conn))
+    return [-conn[i] for i in range(1, length+1)]
+
+
+def width_sequence(height: int, n_terms: int) -> List[int]:
+    """
+    Return `[count_valid_edge_sets(m, height) for m in range(n_terms)]`, with a
+    single forward sweep over the transposed grids.
+    """
+    return [sum(weights) for weights in transfer.forward(height, n_terms - 1)]
+
+
+@lru_cache(maxsize=None)
+def find_recurrence(height: int) -> Recurrence:
+    """
+    Return the minimal linear recurrence satisfied by the valid edge set counts
+    of the `m` x `height` grids as `m` varies.
+
+    The recurrence is fit to the first `2 * 2^height` terms, which determine it
+    uniquely, and cross-checked against `EXTRA_TERMS` further terms. Results
+    are cached per height.
+    """
+    bound = 2 ** height
+    seq = width_sequence(height, 2*bound + EXTRA_TERMS)
+    fitted = berlekamp_massey(seq[:2*bound])
+    assert len(fitted) <= bound
+    if any(c.denominator != 1 for c in fitted):
+        raise RecurrenceError(f"Non-integral recurrence for height {height}: {fitted}")
+    rec = Recurrence(tuple(int(c) for c in fitted), tuple(seq[:len(fitted)]))
+    for m, a in enumerate(seq):
+        if rec.term(m) != a:
+            raise RecurrenceError(f"Recurrence for height {height} fails at width {m}")
+    return rec
+
+
+def count_valid_edge_sets(width: int, height: int) -> int:
+    """
+    Return the number of valid edge sets in the `width` x `height` grid, using
+    the recurrence in the width for the given height.
+
+    >>> count_valid_edge_sets(1000, 3) % 10**9
+    584873073
+    """
+    return find_recurrence(height).term(width)
@@ -0,0 +1,183 @@
+"""
+Fast, buffered rendering of many edge sets at once.
+
+`EdgeSet.pretty_print` is convenient for a single edge set, but it rebuilds the
+whole character grid for every call. A `Renderer` builds the blank grid once
+per `(width, height)`, stamps the edges of each edge set into a reusable
+`bytearray` at precomputed offsets, and writes many rendered edge sets per
+`write` call.
+"""
+from edge_set import Edge
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterable, List, Protocol, Tuple
+
+
+class HasEdges(Protocol):
+    """
+    Anything with an iterable of edges, e.g. `EdgeSet` or `PersistentEdgeSet`.
+    """
+    @property
+    def edges(self) -> Iterable[Edge]: ...
+
+
+# Number of rendered edge sets written per `write` call
+DEFAULT_BATCH_SIZE = 256
+
+HORIZ_CHAR = ord("-")
+VERT_CHAR = ord("|")
+
+
+class Renderer:
+    """
+    Render edge sets on the `width` x `height` grid.
+
+    The output of `render` is byte-for-byte identical to `EdgeSet.pretty_print`
+    (encoded as ASCII), and `write_stacked` produces exactly what printing
+    `f"\\n{c}:\\n" + es.pretty_print()` for each edge set would.
+    """
+    width: int
+    height: int
+    line_len: int
+    template: bytes
+    offsets: Dict[Edge, Tuple[int, ...]]
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.line_len = 3*width + 1
+        blank = "  ".join(["*"] * (width+1))
+        empty = " " * self.line_len
+        lines = [blank if y % 2 == 0 else empty for y in range(2*height+1)]
+        self.template = "\n".join(reversed(lines)).encode("ascii")
+        # byte offsets of the characters drawn for each edge
+        self.offsets = {}
+        for r in range(height+1):
+            for c in range(width):
+                o = self.offset(3*c, 2*r)
+                self.offsets[Edge.horiz_edge(c, r)] = (o+1, o+2)
+        for r in range(height):
+            for c in range(width+1):
+                self.offsets[Edge.vert_edge(c, r)] = (self.offset(3*c, 2*r+1),)
+
+    def offset(self, x: int, y: int) -> int:
+        """
+        Return the offset into the rendered grid of the character at (x, y),
+        where y = 0 is the lowest line of the grid.
+        """
+        return (2*self.height - y) * (self.line_len + 1) + x
+
+    def stamp(self, buf: bytearray, es: HasEdges) -> None:
+        """
+        Draw the edges of `es` into `buf`, which must be a copy of the template.
+        """
+        offsets = self.offsets
+        for e in es.edges:
+            os = offsets[e]
+            if len(os) == 2:
+                buf[os[0]] = HORIZ_CHAR
+                buf[os[1]] = HORIZ_CHAR
+            else:
+                buf[os[0]] = VERT_CHAR
+
+    def render(self, es: HasEdges) -> bytes:
+        """
+        Return the pretty printed edge set.
+        """
+        buf = bytearray(self.template)
+        self.stamp(buf, es)
+        return bytes(buf)
+
+    def write_stacked(
+        self,
+        edge_sets: Iterable[HasEdges],
+        out: BinaryIO,
+        start: int = 1,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """
+        Write each edge set to `out`, preceded by a blank line and its (1-based)
+        index, one below the other. Return the number of edge sets written.
+        """
+        buf = bytearray(self.template)
+        chunks: List[bytes] = []
+        c = start - 1
+        for es in edge_sets:
+            c += 1
+            buf[:] = self.template
+            self.stamp(buf, es)
+            chunks.append(b"\n%d:\n" % c)
+            chunks.append(bytes(buf))
+            chunks.append(b"\n")
+            if len(chunks) >= 3*batch_size:
+                out.write(b"".join(chunks))
+                chunks.clear()
+        if chunks:
+            out.write(b"".join(chunks))
+        return c - start + 1
+
+    def columns_for(self, term_width: int, gap: int = 3) -> int:
+        """
+        Return how many grids fit side by side on a terminal line of `term_width` characters.
+        """
+        return max(1, (term_width + gap) // (self.line_len + gap))
+
+    def write_side_by_side(
+        self,
+        edge_sets: Iterable[HasEdges],
+        out: BinaryIO,
+        columns: int,
+        start: int = 1,
+        gap: int = 3,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """
+        Write the edge sets to `out`, packing `columns` grids per line, each
+        labeled with its (1-based) index. Return the number of edge sets written.
+        """
+        assert columns > 0
+        n_lines = 2*self.height + 1
+        separator = b" " * gap
+        chunks: List[bytes] = []
+        group: List[bytes] = []
+        c = start - 1
+        pending = 0  # number of edge sets in `chunks`
+
+        def flush_group() -> None:
+            labels = [b"%d:" % i for i in range(c - len(group) + 1, c + 1)]
+            cell = max([self.line_len] + [len(label) for label in labels])
+            chunks.append(b"\n")
+            chunks.append(separator.join(label.ljust(cell) for label in labels).rstrip())
+            chunks.append(b"\n")
+            grid_lines = [g.split(b"\n") for g in group]
+            for y in range(n_lines):
+                line = separator.join(lines[y].ljust(cell) for lines in grid_lines)
+                chunks.append(line.rstrip())
+                chunks.append(b"\n")
+            group.clear()
+
+        buf = bytearray(self.template)
+        for es in edge_sets:
+            c += 1
+            buf[:] = self.template
+            self.stamp(buf, es)
+            group.append(bytes(buf))
+            if len(group) == columns:
+                flush_group()
+                pending += columns
+                if pending >= batch_size:
+                    out.write(b"".join(chunks))
+                    chunks.clear()
+                    pending = 0
+        if group:
+            flush_group()
+        if chunks:
+            out.write(b"".join(chunks))
+        return c - start + 1
+
+
+@lru_cache(maxsize=64)
+def get_renderer(width: int, height: int) -> Renderer:
+    """
+    Return a (shared) renderer for the `width` x `height` grid.
+    """
+    return Renderer(width, height)
@@ -0,0 +1,302 @@
+"""
+A long-running query server for valid edge set counts, enumerations and samples.
+
+Start it with `python main.py serve`. The server listens on a Unix socket (or
+a localhost TCP port) and speaks a line-oriented JSON protocol: each request
+is a single JSON object on its own line, e.g.
+
+    {"op": "count", "width": 3, "height": 2}
+    {"op": "count", "width": 3, "height": 2, "engine": "toms"}
+    {"op": "enumerate", "width": 2, "height": 2, "limit": 10}
+    {"op": "sample", "width": 8, "height": 8, "n": 5, "seed": 1}
+
+and each response is one JSON object per line:
+
+- count: `{"ok": true, "count": 533, "engine": "transfer"}`
+- enumerate: one `{"rows": [...], "stacks": [...]}` line per edge set (see
+  `transfer.to_edge_set`), streamed as they are produced, followed by
+  `{"ok": true, "done": true, "n": 115}`
+- sample: `{"ok": true, "samples": [{"rows": [...], "stacks": [...]}, ...]}`
+- errors: `{"ok": false, "error": "..."}`
+
+Counts and the per-grid tables used for sampling are kept warm in a bounded
+LRU cache. Concurrent identical requests are coalesced into a single
+computation, and CPU heavy work runs in a process pool so that the event
+loop stays responsive. See `client.py` for a matching client.
+"""
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import engines
+import transfer
+
+
+# Default location of the server's Unix socket
+DEFAULT_SOCKET = "/tmp/match-sticks.sock"
+
+# Default number of results and tables kept in the LRU cache
+DEFAULT_CACHE_SIZE = 1024
+
+# Number of edge sets produced per step of a streamed enumeration
+ENUMERATION_BATCH_SIZE = 1024
+
+
+class LRUCache:
+    """
+    A dictionary that holds at most `maxsize` entries, evicting the least
+    recently used one when full.
+    """
+    maxsize: int
+    _entries: "OrderedDict[Hashable, Any]"
+
+    def __init__(self, maxsize: int) -> None:
+        assert maxsize > 0
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Return the value for `key` and mark it as the most recently used one.
+        """
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+def _count(width: int, height: int, engine: str) -> Tuple[int, str]:
+    # runs in a worker process
+    result = engines.count(width, height, engine)
+    return result.value, result.engine
+
+
+def _batches(width: int, height: int, limit: Optional[int]) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield the valid edge sets on the grid, in lists of at most
+    `ENUMERATION_BATCH_SIZE` JSON-ready objects.
+    """
+    batch: List[Dict[str, Any]] = []
+    for n, (rows, stacks) in enumerate(transfer.enumerate_rows(width, height)):
+        if limit is not None and n >= limit:
+            break
+        batch.append({"rows": rows, "stacks": stacks})
+        if len(batch) == ENUMERATION_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class QueryServer:
+    """
+    Answers count, enumerate and sample requests, see the module docstring.
+
+    `executor` runs the CPU heavy computations; by default it is a process
+    pool with `workers` processes.
+    """
+    cache: LRUCache
+    executor: Executor
+    in_flight: Dict[Hashable, "asyncio.Future[Any]"]
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.cache = LRUCache(cache_size)
+        self.executor = executor if executor is not None else ProcessPoolExecutor(workers)
+        self.in_flight = {}
+
+    async def cached(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Return `fn(*args)`, computed in the executor, and cached under `key`.
+
+        If the same key is already being computed, wait for that computation
+        instead of starting another one.
+        """
+        if key in self.cache:
+            return self.cache.get(key)
+        if key in self.in_flight:
+            return await asyncio.shield(self.in_flight[key])
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, fn, *args)
+        self.in_flight[key] = future
+        try:
+            result = await future
+            self.cache.put(key, result)
+            return result
+        finally:
+            del self.in_flight[key]
+
+    async def count(self, width: int, height: int, engine: str = "auto") -> Dict[str, Any]:
+        value, answered_by = await self.cached(
+            ("count", width, height, engine), _count, width, height, engine
+        )
+        return {"ok": True, "count": value, "engine": answered_by}
+
+    async def sample(self, width: int, height: int, n: int, seed: Optional[int]) -> Dict[str, Any]:
+        bwd = await self.cached(("backward", width, height), transfer.backward, width, height)
+        rng = random.Random(seed)
+
+        def draw() -> List[Dict[str, Any]]:
+            samples = []
+            for _ in range(n):
+                rows, stacks = transfer.sample_rows(width, height, rng, bwd)
+                samples.append({"rows": rows, "stacks": stacks})
+            return samples
+
+        return {"ok": True, "samples": await asyncio.to_thread(draw)}
+
+    async def enumerate(
+        self,
+        width: int,
+        height: int,
+        limit: Optional[int],
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+    ) -> Dict[str, Any]:
+        batches = _batches(width, height, limit)
+        n = 0
+        while True:
+            # produce each batch off the event loop
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            for es in batch:
+                await send(es)
+            n += len(batch)
+        return {"ok": True, "done": True, "n": n}
+
+    async def dispatch(
+        self,
+        request: Dict[str, Any],
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+    ) -> Dict[str, Any]:
+        """
+        Answer a single request, streaming any intermediate results to `send`,
+        and return the final response.
+        """
+        op = request.get("op")
+        width = int(request["width"])
+        height = int(request["height"])
+        if width < 0 or height < 0:
+            raise ValueError(f"Height ({height}) and width ({width}) must be non-negative!")
+        if op == "count":
+            return await self.count(width, height, request.get("engine", "auto"))
+        if op == "sample":
+            return await self.sample(width, height, int(request.get("n", 1)), request.get("seed"))
+        if op == "enumerate":
+            return await self.enumerate(width, height, request.get("limit"), send)
+        raise ValueError(f"Unknown op: {op}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve the requests on one connection, in order, until it is closed.
+        """
+        async def send(obj: Dict[str, Any]) -> None:
+            writer.write(json.dumps(obj).encode("utf-8") + b"\n")
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.dispatch(json.loads(line), send)
+                except (KeyError, ValueError, TypeError) as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                await send(response)
+        except ConnectionError:
+            logging.info("Client disconnected")
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+
+async def serve(
+    server: QueryServer,
+    socket_path: Optional[str] = DEFAULT_SOCKET,
+    port: Optional[int] = None,
+) -> None:
+    """
+    Serve requests forever, on `port` on localhost if given, otherwise on the
+    Unix socket `socket_path`.
+    """
+    if port is not None:
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", port)
+        logging.info(f"Serving on 127.0.0.1:{port}")
+    else:
+        assert socket_path is not None
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        listener = await asyncio.start_unix_server(server.handle, socket_path)
+        logging.info(f"Serving on {socket_path}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point for `main.py serve`.
+    """
+    parser = argparse.ArgumentParser(prog="main.py serve")
+    parser.add_argument(
+        "--socket",
+        type=str,
+        metavar="PATH",
+        default=DEFAULT_SOCKET,
+        help=f"Unix socket to listen on (default: {DEFAULT_SOCKET})",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="listen on this localhost TCP port instead of a Unix socket",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"number of results and tables to keep warm (default: {DEFAULT_CACHE_SIZE})",
+    )
+    parser.add_argument(
+        "--loglevel",
+        type=str,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        metavar="LEVEL",
+        default="INFO",
+        help="logging level to emit: DEBUG, INFO (default), WARNING, ERROR",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.loglevel), format='%(levelname)s:%(message)s')
+
+    server = QueryServer(args.workers, args.cache_size)
+    try:
+        asyncio.run(serve(server, args.socket, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
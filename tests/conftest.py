@@ -0,0 +1,19 @@
+import os
+import pytest
+import transition_tables
+
+
+@pytest.fixture(autouse=True, scope="session")
+def transition_table_cache(tmp_path_factory):
+    """
+    Keep the transition tables built by the tests out of the user's cache directory.
+    """
+    old = os.environ.get("MATCH_STICKS_CACHE")
+    os.environ["MATCH_STICKS_CACHE"] = str(tmp_path_factory.mktemp("cache"))
+    transition_tables.get_table.cache_clear()
+    yield
+    transition_tables.get_table.cache_clear()
+    if old is None:
+        del os.environ["MATCH_STICKS_CACHE"]
+    else:
+        os.environ["MATCH_STICKS_CACHE"] = old
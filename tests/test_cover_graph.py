@@ -0,0 +1,67 @@
+from external_enumeration import row_offset, unpack
+import cover_graph
+import io
+import transfer
+
+
+def naive_masks(width, height):
+    """
+    Return the valid packed masks, by checking every subset of the edges.
+    """
+    n_bits = row_offset(width, height) + width
+    return [m for m in range(1 << n_bits) if unpack(width, height, m).check_constraints()]
+
+
+def naive_covers(masks):
+    """
+    Return the cover relations of the masks ordered by inclusion, by pairwise subset tests.
+    """
+    index = {m: i for i, m in enumerate(masks)}
+    covers = set()
+    for x in masks:
+        above = [y for y in masks if y != x and x & y == x]
+        for y in above:
+            if not any(z != y and z & y == z for z in above):
+                covers.add((index[x], index[y]))
+    return covers
+
+
+def test_valid_masks():
+    for w, h in [(0, 0), (2, 1), (2, 2)]:
+        masks = cover_graph.valid_masks(w, h)
+        assert masks == naive_masks(w, h)
+
+
+def test_cover_graph():
+    for w, h in [(0, 0), (1, 0), (0, 2), (1, 1), (2, 1), (1, 2), (2, 2)]:
+        out = io.BytesIO()
+        stats = cover_graph.build_cover_graph(w, h, out)
+        out.seek(0)
+        covers = list(cover_graph.read_covers(out))
+        assert len(covers) == stats.n_covers
+        assert set(covers) == naive_covers(naive_masks(w, h))
+
+
+def test_cover_by_two_edges():
+    """
+    On the 1x1 grid, the two horizontal edges are covered by the full square.
+    """
+    masks = cover_graph.valid_masks(1, 1)
+    out = io.BytesIO()
+    cover_graph.build_cover_graph(1, 1, out)
+    out.seek(0)
+    covers = {(masks[i], masks[j]) for i, j in cover_graph.read_covers(out)}
+    assert (0b1001, 0b1111) in covers
+
+
+def test_stats():
+    w, h = 3, 2
+    stats = cover_graph.build_cover_graph(w, h, io.BytesIO())
+    assert stats.n_sets == transfer.count_valid_edge_sets(w, h)
+    assert sum(stats.rank_counts.values()) == stats.n_sets
+    masks = cover_graph.valid_masks(w, h)
+    # the empty set is the only minimal element, and the full grid the only maximal one
+    assert [masks[i] for i in stats.minimal] == [0]
+    assert [masks[i] for i in stats.maximal] == [(1 << (row_offset(w, h) + w)) - 1]
+    for k, n in stats.rank_counts.items():
+        assert n == sum(1 for m in masks if m.bit_count() == k)
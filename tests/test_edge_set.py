@@ -14,6 +14,22 @@ def test_copy():
     assert len(my_memo._memoized) == num_edges + 1
 
 
+def test_copy_is_independent():
+    """
+    Copies (and embeddings) of an edge set don't share its set of edges.
+    """
+    e = EdgeSet(2, 1)
+    e.place_horiz_edge(0, 0)
+    c = copy.copy(e)
+    c.place_horiz_edge(1, 0)
+    f = e.embed()
+    f.place_vert_edge(0, 1)
+    assert e.edges == {Edge.horiz_edge(0, 0)}
+    assert c.edges == {Edge.horiz_edge(0, 0), Edge.horiz_edge(1, 0)}
+    assert f.edges == {Edge.horiz_edge(0, 0), Edge.vert_edge(0, 1)}
+    assert e.height == 1
+
+
 def test_embed():
     e = EdgeSet(3, 0)
     e.place_horiz_stack(0, 0)
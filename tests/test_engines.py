@@ -0,0 +1,71 @@
+from toms_algorithm import count_valid_edge_sets
+import engines
+import pytest
+import transfer
+
+
+def test_closed_forms():
+    """
+    The closed forms agree with Tom's algorithm wherever they apply.
+    """
+    for w in range(6):
+        for h in range(6):
+            if engines.ENGINES["closed_form"].applies(w, h):
+                assert engines.count(w, h, "closed_form").value == count_valid_edge_sets(w, h)
+
+
+def test_auto_prefers_closed_form():
+    for w, h in [(0, 7), (7, 0), (1, 9), (9, 1), (12, 12)]:
+        assert engines.count(w, h).engine == "closed_form"
+    assert engines.count(12, 12).value == engines.square_count(12)
+    assert engines.count(3, 2).engine == "transfer"
+
+
+def test_select_engine_errors():
+    with pytest.raises(ValueError):
+        engines.select_engine(3, 2, "closed_form")
+    with pytest.raises(ValueError):
+        engines.select_engine(3, 2, "no_such_engine")
+    with pytest.raises(ValueError):
+        engines.count(-1, 2)
+
+
+def test_verify():
+    assert engines.verify(2, 2) == engines.Count(115, "closed_form")
+    assert engines.verify(3, 2).value == 533
+    assert engines.verify(2, 1, ["naive", "toms", "transfer", "closed_form"]).value == 23
+
+
+def test_general_engines_agree():
+    for w in range(4):
+        for h in range(4):
+            names = ["toms", "transfer", "recurrence"] + (["naive"] if w + h <= 4 else [])
+            assert len({engines.count(w, h, e).value for e in names}) == 1
+
+
+def test_verify_mismatch(monkeypatch):
+    name = engines.verification_engines(2, 2)[1]
+    broken = engines.ENGINES[name]._replace(run=lambda w, h: 0)
+    monkeypatch.setitem(engines.ENGINES, name, broken)
+    with pytest.raises(engines.EngineMismatchError):
+        engines.verify(2, 2)
+
+
+def test_large_grids():
+    """
+    Costing the general engines on large grids must not overflow.
+    """
+    assert engines.count(40, 40) == engines.Count(engines.square_count(40), "closed_form")
+    assert engines.count(1000, 1).value == engines.height_one_count(1000)
+    assert engines.candidate_engines(200, 3)[0].name == "recurrence"
+    assert engines.candidate_engines(3, 1000)[0].name == "recurrence"
+    expected = transfer.count_valid_edge_sets(3, 200)
+    assert engines.count(200, 3) == engines.Count(expected, "recurrence")
+    assert engines.count(1000, 3).engine == "recurrence"
+    assert engines.verify(3, 300).value == transfer.count_valid_edge_sets(3, 300)
+
+
+def test_verification_engines():
+    assert engines.verification_engines(2, 2) == ["closed_form", "transfer"]
+    assert engines.verification_engines(2, 2, "naive") == ["naive", "closed_form"]
+    assert engines.verification_engines(3, 2) == ["transfer", "toms"]
@@ -0,0 +1,76 @@
+from enumerate_edge_sets import naively_enumerate_edge_sets
+from persistent_edge_set import PersistentEdgeSet
+import external_enumeration
+import pytest
+import transfer
+
+
+def test_parse_size():
+    assert external_enumeration.parse_size("1000") == 1000
+    assert external_enumeration.parse_size("512M") == 512 << 20
+    assert external_enumeration.parse_size("1.5k") == 1536
+    assert external_enumeration.parse_size("16GB") == 16 << 30
+
+
+def test_unpack():
+    """
+    Packing the row states of an edge set and unpacking them gives back the edge set.
+    """
+    width, height = 3, 2
+    for rows, stacks in transfer.enumerate_rows(width, height):
+        record = 0
+        for r, row in enumerate(rows):
+            record |= row << external_enumeration.row_offset(width, r)
+        for r, v in enumerate(stacks):
+            record |= ((1 << v) - 1) << (external_enumeration.row_offset(width, r) + width)
+        assert record.bit_length() <= 8 * external_enumeration.record_size(width, height)
+        es = external_enumeration.unpack(width, height, record)
+        assert es == transfer.to_edge_set(width, rows, stacks)
+
+
+def test_enumerate():
+    for w, h in [(0, 0), (0, 3), (3, 0), (1, 1), (2, 2), (1, 3), (3, 1)]:
+        got = list(external_enumeration.enumerate_edge_sets(w, h, 16 << 20))
+        expected = {PersistentEdgeSet.from_edge_set(es)
+                    for es in naively_enumerate_edge_sets(w, h)}
+        assert len(got) == len(expected)
+        assert set(got) == expected
+
+
+def test_small_budget(tmp_path, monkeypatch):
+    """
+    With a budget of a few records, each level is spread over many runs that
+    are merged in several passes, and every file is deleted at the end.
+    """
+    monkeypatch.setattr(external_enumeration, "WRITE_BUFFER_SIZE", 16)
+    monkeypatch.setattr(external_enumeration, "MAX_FAN_IN", 3)
+    w, h = 2, 3
+    per_record = external_enumeration.RECORD_OVERHEAD + external_enumeration.record_size(w, h)
+    budget = external_enumeration.table_memory(w) + 32 + 10 * per_record
+    enumerator = external_enumeration.LevelEnumerator(w, h, budget, str(tmp_path))
+    assert enumerator.buffer_capacity() == 10
+
+    got = list(enumerator)
+    assert len(got) == transfer.count_valid_edge_sets(w, h)
+    assert len(set(got)) == len(got)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_runs_are_sorted(tmp_path):
+    w, h = 3, 2
+    enumerator = external_enumeration.LevelEnumerator(w, h, 16 << 20, str(tmp_path))
+    try:
+        level = enumerator.build()
+        records = list(external_enumeration.read_records(
+            level, external_enumeration.record_size(w, h)))
+        assert records == sorted(set(records))
+        assert len(records) == transfer.count_valid_edge_sets(w, h)
+    finally:
+        enumerator.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_budget_too_small(tmp_path):
+    with pytest.raises(ValueError):
+        external_enumeration.LevelEnumerator(4, 4, 1024, str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,52 @@
+from edge_set import Edge
+from enumerate_edge_sets import naively_enumerate_edge_sets
+from fractions import Fraction
+import marginals
+import transfer
+
+
+def all_edges(width, height):
+    return (
+        [Edge.horiz_edge(c, r) for c in range(width) for r in range(height+1)] +
+        [Edge.vert_edge(c, r) for c in range(width+1) for r in range(height)]
+    )
+
+
+def test_marginals_match_enumeration():
+    for width, height in [(0, 2), (2, 0), (1, 1), (2, 1), (1, 2), (3, 1), (2, 2)]:
+        valid = [es.edges for es in naively_enumerate_edge_sets(width, height)]
+        m = marginals.Marginals(width, height)
+        assert m.total == len(valid)
+        for e in all_edges(width, height):
+            assert m.count(e) == sum(1 for edges in valid if e in edges)
+
+
+def test_co_occurrences_match_enumeration():
+    for width, height in [(2, 2), (3, 1)]:
+        valid = [es.edges for es in naively_enumerate_edge_sets(width, height)]
+        edges = all_edges(width, height)
+        pairs = [(e1, e2) for e1 in edges for e2 in edges]
+        counts = marginals.co_occurrences(width, height, pairs)
+        for (e1, e2), n in counts.items():
+            assert n == sum(1 for s in valid if e1 in s and e2 in s)
+        assert marginals.count_containing(width, height, []) == len(valid)
+
+
+def test_wide_grid_is_transposed():
+    """
+    Wide, short grids are as cheap as their tall, narrow transposes.
+    """
+    wide = marginals.Marginals(20, 2)
+    tall = marginals.Marginals(2, 20)
+    assert wide.total == tall.total == transfer.count_valid_edge_sets(2, 20)
+    assert wide.count(Edge.horiz_edge(19, 1)) == tall.count(Edge.vert_edge(1, 19))
+    assert wide.count(Edge.vert_edge(20, 0)) == tall.count(Edge.horiz_edge(0, 20))
+    e = Edge.vert_edge(3, 1)
+    assert marginals.count_containing(20, 2, [e]) == wide.count(e)
+
+
+def test_heatmap():
+    m = marginals.Marginals(1, 1)
+    assert m.probability(Edge.horiz_edge(0, 0)) == Fraction(4, 7)
+    assert m.heatmap() == "*--*\n+  -\n*++*"
+    assert m.heatmap(levels=" X") == "*  *\nX   \n*XX*"
@@ -0,0 +1,79 @@
+from edge_set import Edge, EdgeSet
+from enumerate_edge_sets import naively_enumerate_edge_sets
+from persistent_edge_set import PersistentEdgeSet
+from util import subsets
+
+
+def test_embed_shares_structure():
+    e = PersistentEdgeSet(3, 0).with_horiz_stack(0, 0).with_horiz_stack(2, 0)
+    f = e.embed()
+    assert f.height == e.height + 1
+    assert f.width == e.width
+    assert f.edges == e.edges
+    assert [f.horiz_row(r) for r in range(2)] == [0b101, 0]
+    assert f.vert_row(0) == 0
+    # embedding shares all of the row segments with the parent
+    assert all(g is h for g, h in zip(f.segments(), e.segments()))
+
+
+def test_children_do_not_modify_parent():
+    parent = PersistentEdgeSet(2, 2).with_horiz_stack(1, 1)
+    child = parent.with_vert_stack(1, 1)
+    assert parent.edges == {Edge.horiz_edge(1, 0), Edge.horiz_edge(1, 1)}
+    assert child.edges == parent.edges | {Edge.vert_edge(0, 1), Edge.vert_edge(1, 1)}
+    assert [parent.vert_row(r) for r in range(2)] == [0, 0]
+    assert [child.vert_row(r) for r in range(2)] == [0, 0b11]
+    # the untouched row segments are shared with the parent
+    assert child.segments()[0] is parent.segments()[0]
+
+
+def test_add_row():
+    e = PersistentEdgeSet(2, 0).with_horiz_stack(0, 0).add_row(0b01, 0b011)
+    assert e.height == 1
+    assert e.edges == {
+        Edge.horiz_edge(0, 0),
+        Edge.horiz_edge(0, 1),
+        Edge.vert_edge(0, 0),
+        Edge.vert_edge(1, 0),
+    }
+    assert e.check_constraints()
+
+
+def test_round_trip():
+    e = EdgeSet(2, 2)
+    e.place_horiz_stack(0, 2)
+    e.place_horiz_stack(1, 1)
+    e.place_vert_stack(1, 1)
+    p = PersistentEdgeSet.from_edge_set(e)
+    assert p.edges == e.edges
+    assert p.to_edge_set().edges == e.edges
+    assert all(edge in p for edge in e.edges)
+    assert len(p) == len(e.edges)
+    assert p.pretty_print() == e.pretty_print()
+    assert p == PersistentEdgeSet.from_edge_set(p.to_edge_set())
+
+
+def test_check_constraints_agrees():
+    """
+    Check every edge set on the 2x1 and 1x2 grids against `EdgeSet.check_constraints`.
+    """
+    for width, height in [(2, 1), (1, 2)]:
+        all_edges = (
+            [Edge.horiz_edge(c, r) for c in range(width) for r in range(height+1)] +
+            [Edge.vert_edge(c, r) for c in range(width+1) for r in range(height)]
+        )
+        for edge_subset in subsets(all_edges):
+            e = EdgeSet(width, height)
+            e.edges.update(edge_subset)
+            p = PersistentEdgeSet.from_edge_set(e)
+            assert p.check_constraints() == e.check_constraints()
+            for c in range(width+1):
+                for r in range(height+1):
+                    assert p.is_left_ok(c, r) == e.is_left_ok(c, r)
+                    assert p.is_down_ok(c, r) == e.is_down_ok(c, r)
+
+
+def test_valid_sets():
+    valid = {PersistentEdgeSet.from_edge_set(e) for e in naively_enumerate_edge_sets(2, 2)}
+    assert len(valid) == 115
+    assert all(p.check_constraints() for p in valid)
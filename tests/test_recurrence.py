@@ -0,0 +1,35 @@
+from fractions import Fraction
+from toms_algorithm import count_valid_edge_sets
+import recurrence
+import transfer
+
+
+def test_berlekamp_massey():
+    assert recurrence.berlekamp_massey([1, 1, 2, 3, 5, 8, 13]) == [1, 1]
+    assert recurrence.berlekamp_massey([2**m for m in range(6)]) == [2]
+    # a(m) = a(m-1)/2 needs rational coefficients
+    assert recurrence.berlekamp_massey([8, 4, 2, 1]) == [Fraction(1, 2)]
+    assert recurrence.berlekamp_massey([0, 0, 0]) == []
+
+
+def test_height_one():
+    """
+    3^(N+1) - 2^N satisfies a(m) = 5 a(m-1) - 6 a(m-2).
+    """
+    rec = recurrence.find_recurrence(1)
+    assert rec.coefficients == (5, -6)
+    assert rec.term(50) == 3**51 - 2**50
+
+
+def test_matches_toms():
+    for h in range(5):
+        for w in range(7):
+            assert recurrence.count_valid_edge_sets(w, h) == count_valid_edge_sets(w, h)
+
+
+def test_jump_ahead():
+    for h in range(4):
+        rec = recurrence.find_recurrence(h)
+        assert rec.order <= 2**h
+        for w in [37, 100, 257]:
+            assert rec.term(w) == transfer.count_valid_edge_sets(h, w)
@@ -0,0 +1,46 @@
+from enumerate_edge_sets import naively_enumerate_edge_sets
+from persistent_edge_set import PersistentEdgeSet
+from render import Renderer
+import io
+
+
+def test_render_matches_pretty_print():
+    for width, height in [(0, 0), (3, 0), (0, 2), (2, 1), (2, 2)]:
+        r = Renderer(width, height)
+        for es in naively_enumerate_edge_sets(width, height):
+            assert r.render(es) == es.pretty_print().encode("ascii")
+            p = PersistentEdgeSet.from_edge_set(es)
+            assert r.render(p) == es.pretty_print().encode("ascii")
+
+
+def test_write_stacked():
+    """
+    The stacked output is identical to printing each edge set with its index.
+    """
+    sets = list(naively_enumerate_edge_sets(2, 1))
+    expected = "".join(f"\n{c}:\n" + es.pretty_print() + "\n" for c, es in enumerate(sets, 1))
+    out = io.BytesIO()
+    # use a small batch size to exercise the intermediate writes
+    assert Renderer(2, 1).write_stacked(sets, out, batch_size=4) == len(sets)
+    assert out.getvalue() == expected.encode("ascii")
+
+
+def test_write_side_by_side():
+    sets = list(naively_enumerate_edge_sets(1, 1))
+    r = Renderer(1, 1)
+    assert r.columns_for(25) == 4
+    assert r.columns_for(24) == 3
+    out = io.BytesIO()
+    assert r.write_side_by_side(sets, out, columns=4, batch_size=1) == 7
+    expected = """
+1:     2:     3:     4:
+*  *   *  *   *  *   *--*
+              |
+*  *   *--*   *  *   *--*
+
+5:     6:     7:
+*  *   *  *   *--*
+|      |  |   |  |
+*--*   *  *   *--*
+"""
+    assert out.getvalue().decode("ascii") == expected
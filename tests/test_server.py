@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+from server import LRUCache, QueryServer
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import transfer
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert len(cache) == 2
+
+
+def test_coalescing():
+    """
+    Concurrent identical requests share one computation, whose result is then cached.
+    """
+    calls = []
+    lock = threading.Lock()
+
+    def slow_square(x):
+        with lock:
+            calls.append(x)
+        time.sleep(0.1)
+        return x * x
+
+    async def run():
+        server = QueryServer(executor=ThreadPoolExecutor(4))
+        results = await asyncio.gather(*[server.cached(("sq", 3), slow_square, 3)
+                                         for _ in range(5)])
+        again = await server.cached(("sq", 3), slow_square, 3)
+        server.close()
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert results == [9] * 5
+    assert again == 9
+    assert calls == [3]
+
+
+def test_protocol():
+    """
+    Run requests through a server on a Unix socket.
+    """
+    async def run(path):
+        server = QueryServer(executor=ThreadPoolExecutor(2))
+        listener = await asyncio.start_unix_server(server.handle, path)
+        reader, writer = await asyncio.open_unix_connection(path)
+
+        async def request(obj, n_lines=1):
+            writer.write(json.dumps(obj).encode() + b"\n")
+            await writer.drain()
+            return [json.loads(await reader.readline()) for _ in range(n_lines)]
+
+        responses = [
+            await request({"op": "count", "width": 3, "height": 2}),
+            await request({"op": "enumerate", "width": 1, "height": 1}, n_lines=8),
+            await request({"op": "sample", "width": 2, "height": 2, "n": 3, "seed": 7}),
+            await request({"op": "frobnicate", "width": 1, "height": 1}),
+        ]
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        server.close()
+        return responses
+
+    with tempfile.TemporaryDirectory() as tmp:
+        count, enumeration, sample, error = asyncio.run(run(os.path.join(tmp, "s.sock")))
+
+    assert count == [{"ok": True, "count": 533, "engine": "transfer"}]
+
+    assert enumeration[-1] == {"ok": True, "done": True, "n": 7}
+    edge_sets = {transfer.to_edge_set(1, tuple(es["rows"]), tuple(es["stacks"]))
+                 for es in enumeration[:-1]}
+    assert len(edge_sets) == 7
+    assert all(es.check_constraints() for es in edge_sets)
+
+    assert sample[0]["ok"] and len(sample[0]["samples"]) == 3
+
+    assert error[0]["ok"] is False
+    assert "Unknown op" in error[0]["error"]
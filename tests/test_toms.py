@@ -1,4 +1,6 @@
-from toms_algorithm import digits, count_valid_edge_sets
+from toms_algorithm import (
+    digits, count_range, count_valid_edge_sets, count_valid_edge_sets_digits
+)
 import random
 
 
@@ -45,3 +47,24 @@ def test_symmetry():
     for m in range(max_N):
         for n in range(m):
             assert count_valid_edge_sets(m, n) == count_valid_edge_sets(n, m)
+
+
+def test_odometer_matches_digits():
+    """
+    The odometer evaluation agrees with the direct evaluation of Tom's algorithm.
+    """
+    for m in range(5):
+        for n in range(5):
+            assert count_valid_edge_sets(m, n) == count_valid_edge_sets_digits(m, n)
+
+
+def test_count_range_chunks():
+    """
+    Summing `count_range` over any partition of the index range gives the full count.
+    """
+    m, n = 4, 3
+    stop = (n+2)**m
+    bounds = [0] + sorted(random.sample(range(1, stop), 5)) + [stop]
+    chunks = [count_range(m, n, a, b) for a, b in zip(bounds, bounds[1:])]
+    assert sum(chunks) == count_valid_edge_sets(m, n)
+    assert count_range(m, n, 17, 17) == 0
@@ -0,0 +1,55 @@
+from toms_algorithm import count_valid_edge_sets
+from persistent_edge_set import PersistentEdgeSet
+import random
+import transfer
+
+
+def test_submasks():
+    assert sorted(transfer.submasks(0b101)) == [0b000, 0b001, 0b100, 0b101]
+    assert list(transfer.submasks(0)) == [0]
+
+
+def test_allowed_verticals():
+    """
+    Compare each allowed stack size against the constraint checks of a single band.
+    """
+    width = 3
+    for lower in range(1 << width):
+        for upper in transfer.submasks(lower):
+            allowed = transfer.allowed_verticals(width, lower, upper)
+            for v in range(width+2):
+                es = PersistentEdgeSet(width, 0, (lower,)).add_row(upper, (1 << v) - 1)
+                assert es.check_constraints() == bool(allowed >> v & 1)
+
+
+def test_count():
+    for w in range(5):
+        for h in range(5):
+            assert transfer.count_valid_edge_sets(w, h) == count_valid_edge_sets(w, h)
+
+
+def test_sweeps():
+    """
+    At every row, the forward and backward sweeps combine to the total count.
+    """
+    w, h = 3, 4
+    fwd = transfer.forward(w, h)
+    bwd = transfer.backward(w, h)
+    for r in range(h+1):
+        assert sum(f * b for f, b in zip(fwd[r], bwd[r])) == count_valid_edge_sets(w, h)
+
+
+def test_enumerate_rows():
+    for w, h in [(0, 2), (2, 0), (2, 1), (2, 2)]:
+        edge_sets = [transfer.to_edge_set(w, *x) for x in transfer.enumerate_rows(w, h)]
+        assert len(set(edge_sets)) == len(edge_sets) == count_valid_edge_sets(w, h)
+        assert all(es.check_constraints() for es in edge_sets)
+
+
+def test_sample_rows():
+    rng = random.Random(0)
+    bwd = transfer.backward(2, 2)
+    samples = [transfer.sample_rows(2, 2, rng, bwd) for _ in range(2000)]
+    assert set(samples) <= set(transfer.enumerate_rows(2, 2))
+    # with 2000 samples, all 115 valid edge sets are all but certain to appear
+    assert len(set(samples)) == 115
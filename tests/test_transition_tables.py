@@ -0,0 +1,92 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import pytest
+import transfer
+import transition_tables
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("MATCH_STICKS_CACHE", str(tmp_path))
+    transition_tables.get_table.cache_clear()
+    yield tmp_path
+    transition_tables.get_table.cache_clear()
+
+
+def rows(table):
+    return [list(table[lower]) for lower in range(len(table))]
+
+
+def test_build():
+    for width in range(5):
+        table = transition_tables.build(width)
+        assert len(table) == 1 << width
+        assert table.n_transitions == 3 ** width
+        for lower in range(1 << width):
+            assert list(table[lower]) == [
+                (upper, transfer.allowed_verticals(width, lower, upper))
+                for upper in transfer.submasks(lower)
+            ]
+
+
+def test_get_table(cache):
+    width = 4
+    table = transition_tables.get_table(width)
+    path = transition_tables.table_path(width)
+    assert os.path.dirname(path) == str(cache)
+    assert isinstance(table.indices, memoryview)
+    assert table.indices.readonly
+    assert rows(table) == rows(transition_tables.build(width))
+    assert transition_tables.get_table(width) is table
+
+    # a later run maps the stored file without rebuilding it
+    mtime = os.stat(path).st_mtime_ns
+    transition_tables.get_table.cache_clear()
+    assert rows(transition_tables.get_table(width)) == rows(table)
+    assert os.stat(path).st_mtime_ns == mtime
+
+
+def test_load_rejects_other_tables(cache):
+    transition_tables.get_table(2)
+    with pytest.raises(ValueError):
+        transition_tables.load(transition_tables.table_path(2), 3)
+
+
+def test_corrupt_table_is_rebuilt(cache):
+    width = 3
+    path = transition_tables.table_path(width)
+    with open(path, "wb") as f:
+        f.write(b"garbage")
+    assert rows(transition_tables.get_table(width)) == rows(transition_tables.build(width))
+    assert transition_tables.load(path, width).n_transitions == 3 ** width
+
+
+def test_unwritable_cache(tmp_path, monkeypatch):
+    # the cache "directory" is a file, so the table can't be stored
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_bytes(b"")
+    monkeypatch.setenv("MATCH_STICKS_CACHE", str(not_a_dir))
+    transition_tables.get_table.cache_clear()
+    try:
+        table = transition_tables.get_table(3)
+        assert rows(table) == rows(transition_tables.build(3))
+    finally:
+        transition_tables.get_table.cache_clear()
+
+
+def _n_transitions(width):
+    return transition_tables.get_table(width).n_transitions
+
+
+def test_shared_between_processes(cache):
+    width = 5
+    transition_tables.get_table(width)
+    mtime = os.stat(transition_tables.table_path(width)).st_mtime_ns
+    with ProcessPoolExecutor(2) as pool:
+        assert list(pool.map(_n_transitions, [width] * 4)) == [3 ** width] * 4
+    assert os.stat(transition_tables.table_path(width)).st_mtime_ns == mtime
+
+
+def test_transfer_uses_mapped_table(cache):
+    assert isinstance(transfer.transitions(3), transition_tables.TransitionTable)
+    assert os.path.exists(transition_tables.table_path(3))
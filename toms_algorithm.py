@@ -53,6 +53,84 @@ def count(z: int, j: int, b: int, m: int) -> int:
     return sum(1 for d in ds if d <= j) + n_zeros + 2
 
 
+def _update_tallies(ds: List[int], tallies: List[List[int]], js: range, level: int) -> None:
+    """
+    Recompute the tallies at `level` from the digit there and the tallies above it.
+    """
+    d = ds[level]
+    lower = tallies[level]
+    upper = tallies[level+1]
+    for j in js:
+        if d == j:
+            lower[j] = 0
+        elif d < j:
+            lower[j] = upper[j] + 1
+        else:
+            lower[j] = upper[j]
+
+
+def _advance_odometer(ds: List[int], tallies: List[List[int]], js: range, top: int) -> None:
+    """
+    Increment the digits `ds` (least significant first, each at most `top`) in
+    place, then refresh the tallies of the levels whose digits changed.
+
+    The digits must not all be equal to `top`.
+    """
+    k = 0
+    while ds[k] == top:
+        ds[k] = 0
+        k += 1
+    ds[k] += 1
+    for level in range(k, -1, -1):
+        _update_tallies(ds, tallies, js, level)
+
+
+def count_range(m: int, n: int, start: int, stop: int) -> int:
+    """
+    Return the sum of the terms of Tom's algorithm for `start <= i < stop`.
+
+    `count_valid_edge_sets(m, n)` is `count_range(m, n, 0, (n+2)**m)`; any
+    partition of that range into chunks can be evaluated independently (e.g.
+    by parallel workers) and summed.
+
+    Rather than recomputing the base `n+2` digits of every `i` and rescanning
+    them for every `j`, the digits are kept in a mutable array which is
+    advanced like an odometer. Alongside the digits we keep, for every level
+    `k`, the tallies `t[k][j]` that `count` would compute for the digits at
+    positions `k, k+1, ..., m-1` alone: the number of digits `d <= j` before
+    the first occurrence of `j` (or all of them if `j` does not occur). Adding
+    a digit `d` below level `k+1` gives
+
+        t[k][j] = 0                             if d == j
+        t[k][j] = t[k+1][j] + (1 if d < j else 0)   otherwise
+
+    so that `count(i, j, n+2, m) == t[0][j] + 2`. When the odometer advances,
+    only the levels at or below the highest digit that changed are updated,
+    which is O(n) amortized work per `i`.
+    """
+    assert 0 <= start <= stop <= (n+2)**m
+    base = n + 2
+    top = base - 1
+    ds = digits(start, base=base)[:m]
+    ds += [0] * (m - len(ds))
+    # tallies[m] is the (empty) suffix beyond the most significant digit
+    tallies = [[0] * (n+1) for _ in range(m+1)]
+    js = range(1, n+1)
+    for level in range(m-1, -1, -1):
+        _update_tallies(ds, tallies, js, level)
+
+    t0 = tallies[0]
+    total = 0
+    for i in range(start, stop):
+        product = 1
+        for j in js:
+            product *= t0[j] + 2
+        total += product
+        if i + 1 < stop:
+            _advance_odometer(ds, tallies, js, top)
+    return total
+
+
 def count_valid_edge_sets(m: int, n: int) -> int:
     """
     Return the number of valid edge sets in the `m` x `n` rectangular grid.
@@ -67,6 +145,19 @@ def count_valid_edge_sets(m: int, n: int) -> int:
     >>> count_valid_edge_sets(8, 8)
     22111390122811
     """
+    if n == 0:
+        return 2**m
+    return count_range(m, n, 0, (n+2)**m)
+
+
+def count_valid_edge_sets_digits(m: int, n: int) -> int:
+    """
+    Return the number of valid edge sets in the `m` x `n` rectangular grid.
+
+    This is the direct evaluation of Tom's algorithm which computes the digits
+    of every `i` from scratch using `count`. It is much slower than
+    `count_valid_edge_sets`, but is kept as a reference implementation.
+    """
     if n == 0:
         return 2**m
     return sum(
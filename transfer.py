@@ -0,0 +1,206 @@
+"""
+Row-by-row (transfer matrix) description of valid edge sets.
+
+By the downward stack condition, the horizontal edges in each column form a
+stack, so the horizontal edges on row `r+1` are a subset of those on row `r`.
+By the left stack condition, the vertical edges between rows `r` and `r+1`
+form a left-facing stack, which is determined by its size `v` (0 <= v <=
+width+1). A valid edge set is therefore the same thing as a chain of row
+states (bitmasks of the horizontal edges on each row)
+
+    lower_0 >= lower_1 >= ... >= lower_height
+
+together with a stack size `v_r` for each pair of consecutive rows, such that
+the unit squares between the rows satisfy the boundary condition. Whether
+they do only depends on `(lower_r, lower_{r+1}, v_r)`.
+
+Column `c` of a pair of rows is in one of three states: both horizontal
+edges are present (`c` in `upper`), only the lower one is (`c` in `lower`
+but not `upper`), or neither is. The square in column `c` has 3 edges exactly
+when both horizontal edges are present and the stack ends at its left side
+(`v == c+1`), or when only the lower edge is present and the stack covers
+both of its sides (`v >= c+2`).
+"""
+from persistent_edge_set import PersistentEdgeSet
+from typing import Iterator, List, Optional, Tuple
+import random
+import transition_tables
+
+
+def submasks(mask: int) -> Iterator[int]:
+    """
+    Yield every bitmask `sub` with `sub & mask == sub`, largest first.
+    """
+    sub = mask
+    while True:
+        yield sub
+        if sub == 0:
+            return
+        sub = (sub - 1) & mask
+
+
+def allowed_verticals(width: int, lower: int, upper: int) -> int:
+    """
+    Return the bitmask of vertical stack sizes `v` (bit `v` is set if `v` is
+    allowed) between a row with horizontal edges `lower` and the row above it
+    with horizontal edges `upper`.
+
+    `upper` must be a subset of `lower`.
+    """
+    assert upper & ~lower == 0
+    mask = 1  # the empty stack is always allowed
+    for c in range(width):
+        bit = 1 << c
+        if not upper & bit:
+            # the stack may end at the right side of this square ...
+            mask |= 1 << (c+1)
+            if lower & bit:
+                # ... but if only the lower edge is present, it can't go further
+                return mask
+    # no square has only its lower edge, so the full stack is allowed too
+    return mask | 1 << (width+1)
+
+
+def transitions(width: int) -> "transition_tables.TransitionTable":
+    """
+    Return the row transitions for grids of the given width.
+
+    `transitions(width)[lower]` yields all pairs `(upper, allowed)` where
+    `upper` is a subset of `lower` and `allowed` is
+    `allowed_verticals(width, lower, upper)`. The table is built once per
+    width and memory-mapped from the cache directory, see `transition_tables`.
+    """
+    return transition_tables.get_table(width)
+
+
+def forward(width: int, height: int) -> List[List[int]]:
+    """
+    Return the forward sweep over the rows of the grid.
+
+    `forward(width, height)[r][s]` is the number of valid edge sets on the
+    `width` x `r` grid whose top row of horizontal edges is `s`.
+    """
+    table = transitions(width)
+    weights = [1] * (1 << width)
+    sweep = [weights]
+    for _ in range(height):
+        nxt = [0] * (1 << width)
+        for lower, w in enumerate(weights):
+            if w:
+                for upper, allowed in table[lower]:
+                    nxt[upper] += w * allowed.bit_count()
+        weights = nxt
+        sweep.append(weights)
+    return sweep
+
+
+def backward(width: int, height: int) -> List[List[int]]:
+    """
+    Return the backward sweep over the rows of the grid.
+
+    `backward(width, height)[r][s]` is the number of ways to complete a valid
+    edge set on the `width` x `height` grid above row `r`, given that the
+    horizontal edges on row `r` are `s`.
+    """
+    table = transitions(width)
+    weights = [1] * (1 << width)
+    sweep = [weights]
+    for _ in range(height):
+        prev = [0] * (1 << width)
+        for lower in range(1 << width):
+            prev[lower] = sum(weights[upper] * allowed.bit_count()
+                              for upper, allowed in table[lower])
+        weights = prev
+        sweep.append(weights)
+    sweep.reverse()
+    return sweep
+
+
+def count_valid_edge_sets(width: int, height: int) -> int:
+    """
+    Return the number of valid edge sets in the `width` x `height` grid.
+
+    Time complexity is O(height * 3^width).
+
+    >>> [count_valid_edge_sets(i, i) for i in range(7)]
+    [1, 7, 115, 3451, 164731, 11467387, 1096832395]
+    """
+    return sum(forward(width, height)[-1])
+
+
+def bits(mask: int) -> Iterator[int]:
+    """
+    Yield the positions of the set bits in `mask`, least significant first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def to_edge_set(width: int, rows: Tuple[int, ...], stacks: Tuple[int, ...]) -> PersistentEdgeSet:
+    """
+    Return the edge set with horizontal edges `rows[r]` on each row `r` and a
+    vertical stack of size `stacks[r]` between rows `r` and `r+1`.
+    """
+    return PersistentEdgeSet(width, len(stacks), rows, tuple((1 << v) - 1 for v in stacks))
+
+
+def enumerate_rows(
+    width: int,
+    height: int,
+) -> Iterator[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """
+    Yield every valid edge set on the `width` x `height` grid as a pair
+    `(rows, stacks)`, see `to_edge_set`.
+    """
+    table = transitions(width)
+
+    def extend(rows: Tuple[int, ...], stacks: Tuple[int, ...]) -> Iterator:
+        if len(stacks) == height:
+            yield rows, stacks
+            return
+        for upper, allowed in table[rows[-1]]:
+            for v in bits(allowed):
+                yield from extend(rows + (upper,), stacks + (v,))
+
+    for lower in range(1 << width):
+        yield from extend((lower,), ())
+
+
+def sample_rows(
+    width: int,
+    height: int,
+    rng: random.Random,
+    bwd: Optional[List[List[int]]] = None,
+) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """
+    Return a uniformly random valid edge set on the `width` x `height` grid as
+    a pair `(rows, stacks)`, see `to_edge_set`.
+
+    `bwd` is `backward(width, height)`, which can be passed in to avoid
+    recomputing it for every sample.
+    """
+    if bwd is None:
+        bwd = backward(width, height)
+    table = transitions(width)
+    # choose the lowest row with probability proportional to its completions
+    pick = rng.randrange(sum(bwd[0]))
+    lower = 0
+    while pick >= bwd[0][lower]:
+        pick -= bwd[0][lower]
+        lower += 1
+    rows = [lower]
+    stacks = []
+    for r in range(height):
+        weights = bwd[r+1]
+        pick = rng.randrange(bwd[r][lower])
+        for upper, allowed in table[lower]:
+            w = weights[upper] * allowed.bit_count()
+            if pick < w:
+                break
+            pick -= w
+        stacks.append(list(bits(allowed))[pick // weights[upper]])
+        rows.append(upper)
+        lower = upper
+    return tuple(rows), tuple(stacks)
@@ -0,0 +1,191 @@
+"""
+Persistent, memory-mapped row transition tables.
+
+Every row-by-row computation (counting, enumerating, sampling, marginals)
+needs, for each width, the compatible pairs of row states `(lower, upper)`
+along with the allowed vertical stack sizes between them (see `transfer`).
+There are 3^width such pairs, so the table is built once per width and
+rule set, and stored under the cache directory in a compact CSR layout (in
+native byte order, as the tables are only shared on one machine):
+
+    header   MAGIC, RULES_VERSION, width, n_transitions (see HEADER)
+    indptr   2^width + 1 uint64: transitions of `lower` are at
+             indptr[lower] .. indptr[lower+1]-1
+    indices  n_transitions uint32: the `upper` row state of each transition
+    allowed  n_transitions uint32: bitmask of allowed vertical stack sizes
+
+Later runs `mmap` the file read-only, so loading takes milliseconds and all
+processes on a machine that use the same table share one copy of it in the
+page cache. Tables are loaded lazily, on first use in each process.
+
+The cache directory is `$MATCH_STICKS_CACHE`, or `match-sticks` under
+`$XDG_CACHE_HOME` (by default `~/.cache`). Bump `RULES_VERSION` whenever the
+rules in `transfer.allowed_verticals` change, so that stale tables are not
+used.
+"""
+from array import array
+from functools import lru_cache
+from typing import Iterator, Sequence, Tuple
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import transfer
+
+
+MAGIC = b"MSTT"
+
+# Version of the rules that the tables are built from
+RULES_VERSION = 1
+
+# magic, rules version, width, number of transitions; padded to 8 bytes
+HEADER = struct.Struct("<4sIIxxxxQ")
+
+
+def cache_dir() -> str:
+    """
+    Return the directory where transition tables are stored.
+    """
+    if "MATCH_STICKS_CACHE" in os.environ:
+        return os.environ["MATCH_STICKS_CACHE"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "match-sticks")
+
+
+def table_path(width: int) -> str:
+    """
+    Return the path of the table file for the given width.
+    """
+    return os.path.join(cache_dir(), f"transitions-w{width}-r{RULES_VERSION}.bin")
+
+
+class TransitionTable:
+    """
+    The row transitions for grids of the given width, in CSR layout.
+
+    `table[lower]` yields the pairs `(upper, allowed)`, where `upper` is a
+    subset of `lower` and `allowed` is `transfer.allowed_verticals(width,
+    lower, upper)`, largest `upper` first.
+
+    The arrays are either `array`s, or `memoryview`s of a read-only `mmap`.
+    """
+    width: int
+    indptr: Sequence[int]
+    indices: Sequence[int]
+    allowed: Sequence[int]
+
+    def __init__(
+        self,
+        width: int,
+        indptr: Sequence[int],
+        indices: Sequence[int],
+        allowed: Sequence[int],
+    ) -> None:
+        self.width = width
+        self.indptr = indptr
+        self.indices = indices
+        self.allowed = allowed
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def __getitem__(self, lower: int) -> Iterator[Tuple[int, int]]:
+        start, stop = self.indptr[lower], self.indptr[lower+1]
+        return zip(self.indices[start:stop], self.allowed[start:stop])
+
+    @property
+    def n_transitions(self) -> int:
+        return len(self.indices)
+
+
+def build(width: int) -> TransitionTable:
+    """
+    Build the transition table for the given width in memory.
+    """
+    indptr = array("Q", [0])
+    indices = array("I")
+    allowed = array("I")
+    for lower in range(1 << width):
+        for upper in transfer.submasks(lower):
+            indices.append(upper)
+            allowed.append(transfer.allowed_verticals(width, lower, upper))
+        indptr.append(len(indices))
+    return TransitionTable(width, indptr, indices, allowed)
+
+
+def save(table: TransitionTable, path: str) -> None:
+    """
+    Write the table to `path`, atomically, so that concurrent readers never
+    see a partial file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, RULES_VERSION, table.width, table.n_transitions))
+            for arr, typecode in [(table.indptr, "Q"), (table.indices, "I"),
+                                  (table.allowed, "I")]:
+                f.write(array(typecode, arr).tobytes())
+        # readable by every worker on the machine
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load(path: str, width: int) -> TransitionTable:
+    """
+    Map the table stored at `path` into memory, read-only.
+
+    Raises `ValueError` if the file is not a table for the given width built
+    with the current rules.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mm) < HEADER.size:
+        raise ValueError(f"Truncated transition table: {path}")
+    magic, version, file_width, n = HEADER.unpack_from(mm)
+    if (magic, version, file_width) != (MAGIC, RULES_VERSION, width):
+        raise ValueError(f"Transition table {path} is not for width {width} with rules "
+                         f"version {RULES_VERSION}")
+    n_states = 1 << width
+    sizes = [8 * (n_states + 1), 4 * n, 4 * n]
+    if len(mm) != HEADER.size + sum(sizes):
+        raise ValueError(f"Transition table {path} has the wrong size")
+    view = memoryview(mm)
+    start = HEADER.size
+    indptr = view[start:start+sizes[0]].cast("Q")
+    start += sizes[0]
+    indices = view[start:start+sizes[1]].cast("I")
+    start += sizes[1]
+    allowed = view[start:start+sizes[2]].cast("I")
+    return TransitionTable(width, indptr, indices, allowed)
+
+
+@lru_cache(maxsize=None)
+def get_table(width: int) -> TransitionTable:
+    """
+    Return the transition table for the given width, mapped from the cache
+    directory, building and storing it first if needed.
+
+    If the cache directory can't be written, the table is built in memory.
+    """
+    path = table_path(width)
+    try:
+        return load(path, width)
+    except OSError:
+        # not stored yet, or not readable
+        pass
+    except ValueError as e:
+        logging.warning(f"{e}, rebuilding it")
+    table = build(width)
+    try:
+        save(table, path)
+    except OSError as e:
+        logging.warning(f"Could not store transition table in {path}: {e}")
+        return table
+    logging.info(f"Stored transition table for width {width} in {path}")
+    return load(path, width)